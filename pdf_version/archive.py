@@ -0,0 +1,309 @@
+"""
+Compressed columnar archive of past timetables.
+
+Retired months are compacted into one file per region and year:
+
+    ~/.local/share/prayer-times/archive/<region_id>/<year>.pta
+
+Each file holds one column per prayer: minutes since midnight for every day
+of the year, delta-encoded (day-to-day changes are tiny) and zlib-compressed
+separately, plus a bitmap of the days present. A query only decompresses the
+columns it needs; a year of one region is well under 2 KB.
+
+Usage:
+    python -m pdf_version.archive add --region 15 ~/.local/share/prayer-times/2025-12.json
+    python -m pdf_version.archive range --region 15 --start 2025-12-01 --end 2025-12-07
+    python -m pdf_version.archive agg --region 15 --year 2025 --prayer Fajr --fn min
+"""
+
+import argparse
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from . import storage
+
+PRAYER_ORDER = ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]
+
+MAGIC = b"PTA1"
+DAYS = 366  # column length; slot = day of year - 1
+
+
+def get_archive_path(region_id: int, year: int) -> Path:
+    return storage.BASE_DIR / "archive" / str(region_id) / f"{year:04d}.pta"
+
+
+def _encode_column(values) -> bytes:
+    deltas = array("h", [values[0]] + [b - a for a, b in zip(values, values[1:])])
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return zlib.compress(deltas.tobytes(), 9)
+
+
+def _decode_column(blob: bytes):
+    deltas = array("h")
+    deltas.frombytes(zlib.decompress(blob))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return array("h", accumulate(deltas))
+
+
+def _write_year(path: Path, present: bytearray, columns: dict):
+    blobs = [zlib.compress(bytes(present), 9)]
+    blobs += [_encode_column(columns[name]) for name in PRAYER_ORDER]
+    header = json.dumps(
+        {"columns": ["present"] + PRAYER_ORDER, "sizes": [len(b) for b in blobs]}
+    ).encode()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for blob in blobs:
+            f.write(blob)
+    tmp_path.replace(path)
+    _read_blobs.cache_clear()
+    _column.cache_clear()
+
+
+@lru_cache(maxsize=64)
+def _read_blobs(path: Path, mtime_ns: int):
+    """Raw compressed columns of one archive file, keyed by name."""
+    raw = path.read_bytes()
+    if raw[:4] != MAGIC:
+        raise ValueError(f"{path} is not a prayer-times archive")
+    (header_len,) = struct.unpack("<I", raw[4:8])
+    header = json.loads(raw[8 : 8 + header_len])
+    blobs = {}
+    offset = 8 + header_len
+    for name, size in zip(header["columns"], header["sizes"]):
+        blobs[name] = raw[offset : offset + size]
+        offset += size
+    return blobs
+
+
+@lru_cache(maxsize=256)
+def _column(path: Path, mtime_ns: int, name: str):
+    blob = _read_blobs(path, mtime_ns)[name]
+    if name == "present":
+        return zlib.decompress(blob)
+    return _decode_column(blob)
+
+
+def load_year(region_id: int, year: int, prayers=PRAYER_ORDER):
+    """
+    Return (present, {prayer: minutes array}) for one region + year,
+    or None if nothing is archived. Only the requested columns are decoded.
+    """
+    path = get_archive_path(region_id, year)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    present = _column(path, mtime_ns, "present")
+    return present, {name: _column(path, mtime_ns, name) for name in prayers}
+
+
+def _to_minutes(t: str) -> int:
+    hh, mm = map(int, t.split(":"))
+    return hh * 60 + mm
+
+
+def _to_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def archive_month(region_id: int, year: int, month: int, month_data: dict) -> int:
+    """
+    Merge one month (parse_pdf_to_json format) into the region's year file.
+    Returns the number of days stored. Days whose archived times differ from
+    month_data are reported, then overwritten with the new timetable.
+    """
+    loaded = load_year(region_id, year)
+    if loaded:
+        present = bytearray(loaded[0])
+        columns = {name: list(loaded[1][name]) for name in PRAYER_ORDER}
+    else:
+        present = bytearray(DAYS)
+        columns = {name: [0] * DAYS for name in PRAYER_ORDER}
+
+    jan1 = date(year, 1, 1)
+    stored = changed = 0
+    for key, times in sorted(month_data.items()):
+        day = date.fromisoformat(key)
+        if (day.year, day.month) != (year, month):
+            continue
+        try:
+            values = {name: _to_minutes(times[name]) for name in PRAYER_ORDER}
+        except (KeyError, ValueError):
+            print(f"[archive] Skipping {key}: incomplete row {times}")
+            continue
+        slot = (day - jan1).days
+        if present[slot] and any(columns[n][slot] != v for n, v in values.items()):
+            changed += 1
+        for name, value in values.items():
+            columns[name][slot] = value
+        present[slot] = 1
+        stored += 1
+
+    # Missing days repeat the previous value so their deltas compress to nothing
+    for name in PRAYER_ORDER:
+        column = columns[name]
+        for slot in range(1, DAYS):
+            if not present[slot]:
+                column[slot] = column[slot - 1]
+
+    _write_year(get_archive_path(region_id, year), present, columns)
+    if changed:
+        print(
+            f"[archive] {year}-{month:02d} region {region_id}: "
+            f"{changed} day(s) differ from the archived timetable"
+        )
+    print(f"[archive] Archived {stored} day(s) of {year}-{month:02d} for region {region_id}")
+    return stored
+
+
+def archive_json_file(region_id: int, json_path) -> int:
+    """Archive a YYYY-MM.json month file. Returns the number of days stored."""
+    json_path = Path(json_path)
+    year, month = map(int, json_path.stem.split("-"))
+    return archive_month(region_id, year, month, json.loads(json_path.read_text()))
+
+
+def retire_json(region_id: int, json_path) -> bool:
+    """
+    Archive a month JSON that is about to be deleted.
+    Returns False if the file should be kept (the archive could not be written).
+    """
+    try:
+        archive_json_file(region_id, json_path)
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"[archive] {Path(json_path).name} is not a valid month file, not archived: {e}")
+    except OSError as e:
+        print(f"[archive] Could not archive {Path(json_path).name}, keeping it: {e}")
+        return False
+    return True
+
+
+def query_range(region_id: int, start: date, end: date, prayers=PRAYER_ORDER):
+    """
+    Archived times between start and end (inclusive):
+    {"YYYY-MM-DD": {"Fajr": "05:55", ...}, ...} in date order.
+    """
+    result = {}
+    for year in range(start.year, end.year + 1):
+        loaded = load_year(region_id, year, prayers)
+        if not loaded:
+            continue
+        present, columns = loaded
+        jan1 = date(year, 1, 1)
+        first = (max(start, jan1) - jan1).days
+        last = (min(end, date(year, 12, 31)) - jan1).days
+        for slot in range(first, last + 1):
+            if present[slot]:
+                day = jan1 + timedelta(days=slot)
+                result[day.isoformat()] = {
+                    name: _to_time(columns[name][slot]) for name in prayers
+                }
+    return result
+
+
+def aggregate(region_id: int, start: date, end: date, prayer: str, fn: str = "min"):
+    """
+    Aggregate one prayer over a date range.
+    fn: "min" / "max" return (date, "HH:MM"); "mean" returns "HH:MM".
+    Returns None if nothing is archived in the range.
+    """
+    best = None  # (minutes, date) for min/max
+    total = count = 0
+    for year in range(start.year, end.year + 1):
+        loaded = load_year(region_id, year, [prayer])
+        if not loaded:
+            continue
+        present, columns = loaded
+        column = columns[prayer]
+        jan1 = date(year, 1, 1)
+        first = (max(start, jan1) - jan1).days
+        last = (min(end, date(year, 12, 31)) - jan1).days
+        slots = [s for s in range(first, last + 1) if present[s]]
+        if not slots:
+            continue
+        if fn == "mean":
+            total += sum(column[s] for s in slots)
+            count += len(slots)
+            continue
+        pick = min if fn == "min" else max
+        slot = pick(slots, key=column.__getitem__)
+        candidate = (column[slot], jan1 + timedelta(days=slot))
+        if best is None or pick(best[0], candidate[0]) != best[0]:
+            best = candidate
+
+    if fn == "mean":
+        return _to_time(round(total / count)) if count else None
+    if best is None:
+        return None
+    return best[1], _to_time(best[0])
+
+
+def archived_regions():
+    """Region IDs that have anything archived."""
+    root = storage.BASE_DIR / "archive"
+    if not root.exists():
+        return []
+    return sorted(int(p.name) for p in root.iterdir() if p.is_dir() and p.name.isdigit())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the prayer-times history archive.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    add = sub.add_parser("add", help="archive YYYY-MM.json files")
+    add.add_argument("--region", type=int, required=True)
+    add.add_argument("files", nargs="+", type=Path)
+
+    rng = sub.add_parser("range", help="print archived times for a date range")
+    rng.add_argument("--region", type=int, required=True)
+    rng.add_argument("--start", type=date.fromisoformat, required=True)
+    rng.add_argument("--end", type=date.fromisoformat, required=True)
+    rng.add_argument("--prayer", action="append", choices=PRAYER_ORDER)
+
+    agg = sub.add_parser("agg", help="min/max/mean of one prayer")
+    agg.add_argument("--region", type=int, required=True)
+    agg.add_argument("--prayer", choices=PRAYER_ORDER, required=True)
+    agg.add_argument("--fn", choices=["min", "max", "mean"], default="min")
+    agg.add_argument("--year", type=int, help="whole year (or the default for --start/--end)")
+    agg.add_argument("--start", type=date.fromisoformat)
+    agg.add_argument("--end", type=date.fromisoformat)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        for path in args.files:
+            archive_json_file(args.region, path)
+    elif args.command == "range":
+        rows = query_range(args.region, args.start, args.end, args.prayer or PRAYER_ORDER)
+        for day, times in rows.items():
+            print(day, "  ".join(f"{k} {v}" for k, v in times.items()))
+    else:
+        if args.year is None and (args.start is None or args.end is None):
+            agg.error("give --year, or both --start and --end")
+        start = args.start or date(args.year, 1, 1)
+        end = args.end or date(args.year, 12, 31)
+        result = aggregate(args.region, start, end, args.prayer, args.fn)
+        if result is None:
+            print("[archive] No data in range")
+            return 1
+        if args.fn == "mean":
+            print(f"mean {args.prayer}: {result}")
+        else:
+            print(f"{args.fn} {args.prayer}: {result[1]} on {result[0]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+Fetch and parse one month for every catalogued region.
+
+Downloads run on a thread pool (--workers) behind a per-host token bucket
+(--rate requests/second, --burst), so warming every region takes about
+len(regions) / rate seconds instead of one download_pdf() after another.
+Every request attempt, including retries, waits for a token, so a flaky
+server is not hammered harder than a healthy one.
+
+Files go to the shared-cache layout (see shared_cache.py):
+
+    <dest>/<region_id>/YYYY-MM.pdf
+    <dest>/<region_id>/YYYY-MM.json
+
+with <dest> defaulting to PRAYER_TIMES_SHARED_DIR, or
+~/.local/share/prayer-times/regions when that is not set. Each month is
+filled under the same lock schedulers take, and months that already have a
+JSON are skipped unless --force is given.
+
+Every PDF is checked for the city printed on it before it is parsed, which
+verifies the catalog's region IDs: a PDF naming another catalogued city is
+moved aside as YYYY-MM.pdf.rejected and reported as "mismatch", and the
+report lists unverified regions whose city was confirmed.
+
+Usage:
+    python -m pdf_version.bulk_fetch --month 2026-02
+    python -m pdf_version.bulk_fetch --month 2026-02 --regions toshkent,15 --rate 2
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+from . import clock, pdf_parser, regions, storage
+from .pdf_parser import download_pdf, parse_pdf_to_json
+from .shared_cache import FILE_MODE, MIN_PDF_SIZE_BYTES, locked, make_region_dir
+
+
+class HostRateLimiter:
+    """Token bucket per host: at most `rate` requests/second, bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._buckets = {}  # host -> (tokens, last refill)
+
+    def wait(self, host: str) -> float:
+        """Block until a request to host may be sent. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return waited
+                self._buckets[host] = (tokens, now)
+                delay = (1 - tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def default_dest() -> Path:
+    return storage.SHARED_DIR or storage.BASE_DIR / "regions"
+
+
+def _has_json(json_path: Path) -> bool:
+    try:
+        return json_path.stat().st_size > 0
+    except OSError:
+        return False
+
+
+def check_city(region_id: int, pdf_path: Path):
+    """
+    Compare the city printed on a timetable PDF with the catalog entry.
+    Returns (status, detail): "confirmed", "mismatch" (detail names the
+    cities found instead) or "unknown" (no catalogued city on the page).
+    """
+    found = regions.cities_in(pdf_parser.pdf_text(pdf_path))
+    if any(region.id == region_id for region in found):
+        return "confirmed", None
+    if found:
+        return "mismatch", ", ".join(f"{region.name} ({region.id})" for region in found)
+    return "unknown", None
+
+
+def fetch_region(
+    region_id: int,
+    year: int,
+    month: int,
+    dest: Path,
+    limiter: HostRateLimiter,
+    base_url: str | None = None,
+    retries: int = 3,
+    backoff: float = 10,
+    timeout: float = 30,
+    force: bool = False,
+):
+    """
+    Download and parse one month for one region into dest/<region_id>/.
+    Returns a result dict: region_id, status ("ok" / "cached" / "mismatch" /
+    "failed"), city (see check_city, None if there is no PDF), error, seconds.
+
+    Args:
+        region_id: Region ID for islom.uz
+        year, month: The month to fetch
+        dest: Root directory (shared-cache layout)
+        limiter: Rate limiter shared by all workers
+        base_url: Server to download from (default: pdf_parser.BASE_URL)
+        retries: Download attempts per region
+        backoff: Wait before retry N is N * backoff seconds
+        timeout: Request timeout in seconds
+        force: Re-download even if the JSON already exists
+    """
+    started = time.perf_counter()
+    region_dir = dest / str(region_id)
+    name = f"{year:04d}-{month:02d}"
+    pdf_path, json_path = region_dir / f"{name}.pdf", region_dir / f"{name}.json"
+    host = urlsplit(base_url or pdf_parser.BASE_URL).netloc
+
+    def result(status, error=None, city=None):
+        return {
+            "region_id": region_id,
+            "status": status,
+            "city": city,
+            "error": error,
+            "seconds": time.perf_counter() - started,
+        }
+
+    city = None
+    try:
+        make_region_dir(region_dir)
+        with locked(region_dir / f"{name}.lock", exclusive=True):
+            if not force and _has_json(json_path):
+                if not pdf_path.exists():
+                    return result("cached")
+                city, found = check_city(region_id, pdf_path)
+                if city == "mismatch":
+                    return result("mismatch", f"cached PDF is for {found}", city)
+                return result("cached", city=city)
+
+            if force or not pdf_path.exists() or pdf_path.stat().st_size < MIN_PDF_SIZE_BYTES:
+                for attempt in range(1, retries + 1):
+                    limiter.wait(host)
+                    try:
+                        download_pdf(
+                            region_id,
+                            year,
+                            month,
+                            timeout=timeout,
+                            retries=1,
+                            cleanup=False,
+                            pdf_path=pdf_path,
+                            base_url=base_url,
+                        )
+                        break
+                    except RuntimeError:
+                        if attempt == retries:
+                            raise
+                        time.sleep(attempt * backoff)
+
+            city, found = check_city(region_id, pdf_path)
+            if city == "mismatch":
+                # Wrong region behind this ID: publish no JSON for it
+                pdf_path.replace(pdf_path.with_name(f"{pdf_path.name}.rejected"))
+                return result("mismatch", f"PDF is for {found}", city)
+            parse_pdf_to_json(pdf_path, cleanup=False, json_path=json_path)
+            for path in (pdf_path, json_path):
+                try:
+                    path.chmod(FILE_MODE)
+                except OSError:
+                    pass
+    except Exception as e:
+        # The city may be confirmed even if parsing failed
+        return result("failed", str(e), city)
+    return result("ok", city=city)
+
+
+def bulk_fetch(
+    region_ids,
+    year: int,
+    month: int,
+    dest: Path | None = None,
+    workers: int = 8,
+    rate: float = 4.0,
+    burst: int = 4,
+    base_url: str | None = None,
+    retries: int = 3,
+    backoff: float = 10,
+    timeout: float = 30,
+    force: bool = False,
+    quiet: bool = True,
+):
+    """Fetch one month for many regions. Returns a report dict (see print_report)."""
+    dest = Path(dest) if dest else default_dest()
+    limiter = HostRateLimiter(rate, burst)
+    log = io.StringIO()
+    redirect = contextlib.redirect_stdout(log) if quiet else contextlib.nullcontext()
+    started = time.perf_counter()
+    with redirect, ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(
+            pool.map(
+                lambda region_id: fetch_region(
+                    region_id,
+                    year,
+                    month,
+                    dest,
+                    limiter,
+                    base_url=base_url,
+                    retries=retries,
+                    backoff=backoff,
+                    timeout=timeout,
+                    force=force,
+                ),
+                region_ids,
+            )
+        )
+    return {
+        "month": f"{year:04d}-{month:02d}",
+        "dest": dest,
+        "results": results,
+        "wall_seconds": time.perf_counter() - started,
+    }
+
+
+def print_report(report: dict):
+    counts = {}
+    for r in report["results"]:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+        region = regions.get(r["region_id"])
+        label = f"{r['region_id']:>4} {region.name if region else '?':<12}"
+        line = f"[bulk fetch] {label} {r['status']:<8} {r['seconds']:6.1f}s"
+        if r["city"] and r["status"] != "mismatch":
+            line += f"  city {r['city']}"
+        if r["error"]:
+            line += f"  {r['error']}"
+        print(line)
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(
+        f"[bulk fetch] {report['month']}: {summary} in {report['wall_seconds']:.1f}s "
+        f"-> {report['dest']}"
+    )
+    confirmed = [
+        str(r["region_id"])
+        for r in report["results"]
+        if r["city"] == "confirmed"
+        and regions.get(r["region_id"])
+        and not regions.get(r["region_id"]).verified
+    ]
+    if confirmed:
+        print(
+            f"[bulk fetch] City confirmed for unverified region(s) {', '.join(confirmed)}: "
+            "set verified=True in regions.py"
+        )
+
+
+def _parse_regions(value: str):
+    """'all', or a comma list of IDs / names, e.g. 'toshkent,15,farg'ona'."""
+    if value == "all":
+        return [region.id for region in regions.REGIONS]
+    try:
+        return [int(part) if part.isdigit() else regions.resolve(part).id for part in value.split(",")]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _parse_month(value: str):
+    year, month = map(int, value.split("-"))
+    return year, month
+
+
+def main(argv=None):
+    today = clock.today()
+    parser = argparse.ArgumentParser(description="Fetch and parse one month for every region.")
+    parser.add_argument("--month", type=_parse_month, default=(today.year, today.month), help="YYYY-MM")
+    parser.add_argument("--regions", type=_parse_regions, default="all", help="'all' or e.g. toshkent,15")
+    parser.add_argument("--dest", type=Path, help="default: $PRAYER_TIMES_SHARED_DIR or ~/.local/share/prayer-times/regions")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=4.0, help="requests/second per host")
+    parser.add_argument("--burst", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--base-url", help="e.g. a local standin_server")
+    parser.add_argument("--force", action="store_true", help="re-fetch months that are already cached")
+    parser.add_argument("--verbose", action="store_true", help="show downloader/parser log output")
+    args = parser.parse_args(argv)
+
+    report = bulk_fetch(
+        args.regions,
+        *args.month,
+        dest=args.dest,
+        workers=args.workers,
+        rate=args.rate,
+        burst=args.burst,
+        base_url=args.base_url,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+        force=args.force,
+        quiet=not args.verbose,
+    )
+    print_report(report)
+    return 0 if all(r["status"] in ("ok", "cached") for r in report["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
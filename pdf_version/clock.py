@@ -0,0 +1,64 @@
+import time
+from datetime import date, datetime, timedelta
+
+
+class SystemClock:
+    """Wall clock. This is what the scheduler uses in production."""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def today(self) -> date:
+        return date.today()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Clock that only moves when told to.
+
+    sleep() returns immediately and advances the virtual time instead,
+    so a month of scheduler behaviour can be replayed in seconds.
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def today(self) -> date:
+        return self._now.date()
+
+    def sleep(self, seconds: float):
+        self._now += timedelta(seconds=seconds)
+
+    def set(self, when: datetime):
+        self._now = when
+
+
+_clock = SystemClock()
+
+
+def set_clock(new_clock):
+    """Replace the clock used by the scheduler (e.g. with a VirtualClock)."""
+    global _clock
+    _clock = new_clock
+
+
+def get_clock():
+    return _clock
+
+
+def now() -> datetime:
+    return _clock.now()
+
+
+def today() -> date:
+    return _clock.today()
+
+
+def sleep(seconds: float):
+    _clock.sleep(seconds)
@@ -0,0 +1,158 @@
+"""
+Download throughput harness for download_pdf against the local stand-in server.
+
+Starts standin_server in a background thread, downloads one month for many
+regions concurrently with the real download_pdf (retries and backoff
+included), and reports success rate, time-to-data and bytes transferred.
+
+Usage:
+    python -m pdf_version.download_bench --regions 1-40 --workers 8 \
+        --error-rate 0.2 --html-rate 0.1 --truncate-rate 0.1 --latency 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .pdf_parser import download_pdf
+from .standin_server import StandInServer, add_fault_arguments, faults_from_args
+
+
+def _download_one(base_url, region_id, year, month, dest_dir, retries, backoff, timeout):
+    pdf_path = Path(dest_dir) / f"{region_id}-{year:04d}-{month:02d}.pdf"
+    started = time.perf_counter()
+    try:
+        download_pdf(
+            region_id,
+            year,
+            month,
+            timeout=timeout,
+            retries=retries,
+            cleanup=False,
+            pdf_path=pdf_path,
+            base_url=base_url,
+            backoff_seconds=backoff,
+        )
+        ok = pdf_path.read_bytes().lstrip(b"\r\n\t ").startswith(b"%PDF-")
+    except Exception:
+        ok = False
+    return region_id, ok, time.perf_counter() - started
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_bench(
+    regions,
+    year: int,
+    month: int,
+    faults,
+    workers: int = 8,
+    retries: int = 3,
+    backoff: float = 0.2,
+    timeout: float = 5,
+    quiet: bool = True,
+):
+    """Run one bench round. Returns a report dict (see print_report)."""
+    server = StandInServer(faults=faults, year=year)
+    server.start_background()
+    log = io.StringIO()
+    try:
+        with tempfile.TemporaryDirectory(prefix="prayer-dl-bench-") as dest_dir:
+            redirect = contextlib.redirect_stdout(log) if quiet else contextlib.nullcontext()
+            started = time.perf_counter()
+            with redirect, ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(
+                    pool.map(
+                        lambda r: _download_one(
+                            server.base_url, r, year, month, dest_dir, retries, backoff, timeout
+                        ),
+                        regions,
+                    )
+                )
+            wall = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    ok_times = [elapsed for _, ok, elapsed in results if ok]
+    return {
+        "downloads": len(results),
+        "succeeded": len(ok_times),
+        "failed_regions": [region for region, ok, _ in results if not ok],
+        "wall_seconds": wall,
+        "ttd_p50": _percentile(ok_times, 50),
+        "ttd_p95": _percentile(ok_times, 95),
+        "ttd_max": max(ok_times) if ok_times else None,
+        "requests": server.stats.requests,
+        "bytes_sent": server.stats.bytes_sent,
+        "outcomes": dict(server.stats.outcomes),
+    }
+
+
+def print_report(report: dict):
+    total = report["downloads"]
+    rate = report["succeeded"] / total * 100 if total else 0.0
+    print(f"[download bench] Downloads:     {report['succeeded']}/{total} ok ({rate:.1f}%)")
+    if report["failed_regions"]:
+        print(f"[download bench] Failed:        regions {report['failed_regions']}")
+    print(f"[download bench] Wall time:     {report['wall_seconds']:.2f}s")
+    if report["ttd_p50"] is not None:
+        print(
+            f"[download bench] Time-to-data:  p50 {report['ttd_p50']:.2f}s, "
+            f"p95 {report['ttd_p95']:.2f}s, max {report['ttd_max']:.2f}s"
+        )
+    print(f"[download bench] HTTP requests: {report['requests']}")
+    print(f"[download bench] Bytes sent:    {report['bytes_sent']}")
+    print(f"[download bench] Responses:     {report['outcomes']}")
+
+
+def _parse_regions(value: str):
+    regions = []
+    for part in value.split(","):
+        if "-" in part:
+            lo, hi = map(int, part.split("-"))
+            regions.extend(range(lo, hi + 1))
+        else:
+            regions.append(int(part))
+    return regions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark download_pdf against a faulty stand-in server.")
+    parser.add_argument("--regions", type=_parse_regions, default=_parse_regions("1-20"), help="e.g. 1-40 or 15,27")
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--month", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.2, help="seconds; production uses 10")
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--verbose", action="store_true", help="show downloader log output")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    report = run_bench(
+        args.regions,
+        args.year,
+        args.month,
+        faults_from_args(args),
+        workers=args.workers,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout,
+        quiet=not args.verbose,
+    )
+    print_report(report)
+    return 0 if report["succeeded"] == report["downloads"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
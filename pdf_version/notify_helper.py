@@ -52,7 +52,7 @@ def notify(
     Args:
         title: Notification title
         message: Notification body
-        sound: Path to sound file (None = use default)
+        sound: Path to sound file (None = use default, False = no sound)
         volume: Sound volume 0.0-1.0 (default: 1.0)
         urgency: 'low', 'normal', or 'critical' (default: 'critical')
         icon: Icon name or path (default: None = system default)
@@ -83,6 +83,6 @@ def notify(
 
     # Play sound (fire-and-forget)
     try:
-        _play_sound(sound or DEFAULT_SOUND, volume=volume)
+        _play_sound(DEFAULT_SOUND if sound is None else sound, volume=volume)
     except Exception as e:
         print(f"[Notification] Sound playback error: {e}")
@@ -1,9 +1,14 @@
 import json
+import os
 import pdfplumber
 import requests
-import time
+from pathlib import Path
+from . import archive, clock
+from .validation import validate_month
 from .storage import get_month_paths
 
+BASE_URL = "https://islom.uz"  # overridden by the local stand-in server in tests
+
 # mapping Uzbek → English prayer names
 PRAYER_MAP = {
     "тонг (саҳарлик)": "Fajr",
@@ -40,7 +45,12 @@ def find_column_index(header_row, possible_names):
     raise ValueError(f"Could not find column with any of: {possible_names}")
 
 
-def cleanup_old_files(current_year: int, current_month: int, keep_json: bool = True):
+def cleanup_old_files(
+    current_year: int,
+    current_month: int,
+    keep_json: bool = True,
+    region_id: int | None = None,
+):
     """
     Remove PDF and JSON files older than the current month.
 
@@ -48,6 +58,7 @@ def cleanup_old_files(current_year: int, current_month: int, keep_json: bool = T
         current_year: Year of the current month to keep
         current_month: Month of the current month to keep
         keep_json: If True, only delete PDFs. If False, delete both PDFs and JSONs.
+        region_id: If given, JSONs are compacted into the history archive before deletion
     """
 
     current_path, _ = get_month_paths(current_year, current_month)
@@ -77,6 +88,10 @@ def cleanup_old_files(current_year: int, current_month: int, keep_json: bool = T
                 if not keep_json:
                     json_file = pdf_file.with_suffix(".json")
                     if json_file.exists():
+                        if region_id is not None and not archive.retire_json(
+                            region_id, json_file
+                        ):
+                            continue
                         json_file.unlink()
                         print(f"[Cleanup] Deleted old JSON: {json_file.name}")
 
@@ -94,6 +109,9 @@ def download_pdf(
     timeout: int = 30,
     retries: int = 3,
     cleanup: bool = True,
+    pdf_path=None,
+    base_url: str | None = None,
+    backoff_seconds: float = 10,
 ):
     """
     Download the prayer times PDF from islom.uz for given region + month.
@@ -107,11 +125,15 @@ def download_pdf(
         timeout: Request timeout in seconds
         retries: Number of retry attempts
         cleanup: If True, delete old PDFs after successful download
+        pdf_path: Where to save the PDF (default: the local storage path)
+        base_url: Server to download from (default: BASE_URL)
+        backoff_seconds: Wait before retry N is N * backoff_seconds
     """
     # Example URL: https://islom.uz/prayertime/pdf/15/12
-    url = f"https://islom.uz/prayertime/pdf/{region_id}/{month}"
+    url = f"{base_url or BASE_URL}/prayertime/pdf/{region_id}/{month}"
 
-    pdf_path, json_path = get_month_paths(year, month)
+    if pdf_path is None:
+        pdf_path, _ = get_month_paths(year, month)
 
     print(f"[PDF Downloader] Fetching: {url}")
 
@@ -164,11 +186,16 @@ def download_pdf(
                 else:
                     raise RuntimeError(f"Missing PDF header. First bytes: {data[:20]}")
 
+            # A complete PDF ends with %%EOF (plus optional whitespace);
+            # anything else is a body that was cut off somewhere
+            if b"%%EOF" not in data[-1024:]:
+                raise RuntimeError("PDF is truncated (no %%EOF marker)")
+
             # Use the original data (with whitespace) for saving
             # PDFs can technically start with whitespace
 
-            # Atomic write
-            tmp_path = pdf_path.with_suffix(".tmp")
+            # Atomic write (per-process temp name so concurrent downloads don't race)
+            tmp_path = pdf_path.with_name(f".{pdf_path.name}.{os.getpid()}.tmp")
             tmp_path.write_bytes(data)
             tmp_path.replace(pdf_path)
 
@@ -187,9 +214,9 @@ def download_pdf(
             print(f"[PDF Downloader] Error: {e}")
 
         if attempt < retries:
-            sleep_time = attempt * 10
+            sleep_time = attempt * backoff_seconds
             print(f"[PDF Downloader] Retrying in {sleep_time} seconds...")
-            time.sleep(sleep_time)
+            clock.sleep(sleep_time)
         else:
             print("[PDF Downloader] All retries failed.")
             raise RuntimeError("Failed to download PDF after multiple attempts")
@@ -197,7 +224,15 @@ def download_pdf(
     return None
 
 
-def parse_pdf_to_json(pdf_path, cleanup: bool = True):
+def pdf_text(pdf_path) -> str:
+    """Plain text of the PDF's first page (title, city name and the table)."""
+    with pdfplumber.open(pdf_path) as pdf:
+        return pdf.pages[0].extract_text() or ""
+
+
+def parse_pdf_to_json(
+    pdf_path, cleanup: bool = True, json_path=None, region_id: int | None = None
+):
     """
     Read table from the monthly prayer PDF and convert it
     into JSON-serializable structure:
@@ -213,6 +248,8 @@ def parse_pdf_to_json(pdf_path, cleanup: bool = True):
     Args:
         pdf_path: Path to the PDF file
         cleanup: If True, delete old JSON files after successful parsing
+        json_path: Where to save the JSON (default: the local storage path)
+        region_id: Region of the PDF; old JSONs are archived under it on cleanup
     """
 
     print(f"[PDF Parser] Opening PDF: {pdf_path}")
@@ -256,6 +293,7 @@ def parse_pdf_to_json(pdf_path, cleanup: bool = True):
 
     # Build result
     month_data = {}
+    pdf_path = Path(pdf_path)
     pdf_name = pdf_path.stem  # "2025-12"
     year, month = pdf_name.split("-")
     y = int(year)
@@ -282,15 +320,44 @@ def parse_pdf_to_json(pdf_path, cleanup: bool = True):
             "Isha": str(row[col_isha]).strip(),
         }
 
-    # Save JSON
-    _, json_path = get_month_paths(y, m)
-    json_path.write_text(json.dumps(month_data, indent=2, ensure_ascii=False))
+    if json_path is None:
+        _, json_path = get_month_paths(y, m)
+
+    # Validate once here so nothing downstream has to cope with bad cells.
+    # The previous month (if still on disk) anchors the day-1 deltas.
+    prev_y, prev_m = (y, m - 1) if m > 1 else (y - 1, 12)
+    prev_json = json_path.with_name(f"{prev_y:04d}-{prev_m:02d}.json")
+    previous_month = None
+    if prev_json.exists():
+        try:
+            previous_month = json.loads(prev_json.read_text())
+        except ValueError:
+            pass
+    try:
+        month_data, problems = validate_month(y, m, month_data, previous_month)
+    except RuntimeError:
+        # Move the PDF aside (kept for inspection): left in place, every
+        # retry would skip the download and re-parse the same bad file
+        rejected = pdf_path.with_name(f"{pdf_path.name}.rejected")
+        try:
+            pdf_path.replace(rejected)
+            print(f"[PDF Parser] Rejected PDF moved to {rejected}")
+        except OSError:
+            pass
+        raise
+    for problem in problems:
+        print(f"[PDF Parser] Validation: {problem}")
+
+    # Save JSON (atomic, readers may be other processes)
+    tmp_path = json_path.with_name(f".{json_path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(month_data, indent=2, ensure_ascii=False))
+    tmp_path.replace(json_path)
 
     print(f"[PDF Parser] Parsed {len(month_data)} days")
     print(f"[PDF Parser] JSON saved to: {json_path}")
 
     # Clean up old JSON files after successful parsing
     if cleanup:
-        cleanup_old_files(y, m, keep_json=False)
+        cleanup_old_files(y, m, keep_json=False, region_id=region_id)
 
     return month_data
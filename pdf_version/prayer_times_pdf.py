@@ -1,6 +1,8 @@
 import json
-from datetime import datetime, date, timedelta
+from datetime import timedelta
+from . import clock
 from .storage import get_month_paths
+from .validation import normalize_times
 
 PRAYER_ORDER = ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]
 
@@ -13,7 +15,7 @@ def load_month_data(year: int, month: int):
         return None  # Scheduler will know to download/parse
 
     try:
-        return json.loads(json_path.read_text())
+        return normalize_times(json.loads(json_path.read_text()))
     except Exception:
         return None
 
@@ -28,7 +30,7 @@ def get_today_schedule():
     }
     If no data exists, returns None.
     """
-    today = date.today()
+    today = clock.today()
     data = load_month_data(today.year, today.month)
     if not data:
         return None
@@ -49,17 +51,17 @@ def get_next_prayer(schedule: dict):
     ('Fajr', '05:55')
     or the next prayer after current time.
     """
-    now = datetime.now()
-    now_m = now.hour * 60 + now.minute
+    # Times are zero-padded HH:MM (validated at ingest, padded again on load
+    # for older JSON), so string order is time order
+    now_str = clock.now().strftime("%H:%M")
 
     for name in PRAYER_ORDER:
-        t = schedule[name]
-        t_m = time_str_to_minutes(t)
-        if t_m > now_m:
+        t = schedule.get(name)
+        if t and t > now_str:
             return name, t
 
     # If all times passed → next day's Fajr (tomorrow)
-    tomorrow = date.today() + timedelta(days=1)
+    tomorrow = clock.today() + timedelta(days=1)
     data = load_month_data(tomorrow.year, tomorrow.month)
 
     if not data:
@@ -0,0 +1,214 @@
+"""
+Catalog of islom.uz regions and a name index over it.
+
+download_pdf() takes the bare numeric region ID used in islom.uz URLs
+(/prayertime/pdf/<region_id>/<month>). REGIONS maps those IDs to names in
+Uzbek Latin and Cyrillic (plus common Russian/English spellings) and city
+coordinates, and search() finds a region from any of them:
+
+    search("nam")       -> prefix match: Namangan (15)
+    search("Ташкент")   -> alias: Toshkent (27)
+    search("samarkant") -> fuzzy match: Samarqand (18)
+
+Names are folded to one ASCII key before matching, so Latin and Cyrillic
+spellings, apostrophes (Qo'qon / Qoʻqon / Qoqon) and case don't matter.
+
+Usage:
+    python -m pdf_version.regions            # list the catalog
+    python -m pdf_version.regions farg       # search by name or ID
+"""
+
+import argparse
+import bisect
+import difflib
+import re
+import sys
+
+# Uzbek (and Russian) Cyrillic -> Latin, as used in the folded index keys
+_TRANSLIT = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "x", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya", "ў": "o", "қ": "q",
+    "ғ": "g", "ҳ": "h",
+}
+_DROP = "'`ʻʼ’‘-. "
+
+
+class Region:
+    __slots__ = ("id", "name", "name_cyrillic", "lat", "lon", "aliases", "verified")
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        name_cyrillic: str,
+        lat: float,
+        lon: float,
+        aliases=(),
+        verified: bool = False,
+    ):
+        self.id = id
+        self.name = name
+        self.name_cyrillic = name_cyrillic
+        self.lat = lat
+        self.lon = lon
+        self.aliases = tuple(aliases)
+        self.verified = verified  # ID checked against a real download
+
+    def names(self):
+        return (self.name, self.name_cyrillic) + self.aliases
+
+    def __repr__(self) -> str:
+        return f"Region({self.id}, {self.name!r})"
+
+
+# Region 15 (Namangan) is the one the scheduler has always used and the only
+# ID checked against a real download so far. The other IDs follow islom.uz's
+# region list; bulk_fetch checks the city printed on every PDF it downloads
+# (see cities_in) and lists the regions it confirmed, so they can be marked
+# verified=True here.
+REGIONS = [
+    Region(1, "Andijon", "Андижон", 40.7821, 72.3442, ["Andijan", "Андижан"]),
+    Region(4, "Buxoro", "Бухоро", 39.7747, 64.4286, ["Bukhara", "Бухара"]),
+    Region(5, "Guliston", "Гулистон", 40.4897, 68.7842, ["Gulistan", "Гулистан"]),
+    Region(6, "Denov", "Денов", 38.2667, 67.8986, ["Denau", "Денау"]),
+    Region(9, "Jizzax", "Жиззах", 40.1158, 67.8422, ["Jizzakh", "Джизак"]),
+    Region(10, "Zarafshon", "Зарафшон", 41.5744, 64.2011, ["Zarafshan", "Зарафшан"]),
+    Region(14, "Navoiy", "Навоий", 40.1039, 65.3688, ["Navoi", "Навои"]),
+    Region(15, "Namangan", "Наманган", 40.9983, 71.6726, verified=True),
+    Region(16, "Nukus", "Нукус", 42.4531, 59.6103),
+    Region(18, "Samarqand", "Самарқанд", 39.6542, 66.9597, ["Samarkand", "Самарканд"]),
+    Region(21, "Xiva", "Хива", 41.3783, 60.3639, ["Khiva"]),
+    Region(24, "Shahrisabz", "Шаҳрисабз", 39.0578, 66.8342, ["Шахрисабз"]),
+    Region(25, "Qarshi", "Қарши", 38.8606, 65.7891, ["Karshi", "Карши"]),
+    Region(26, "Qo'qon", "Қўқон", 40.5286, 70.9425, ["Kokand", "Коканд"]),
+    Region(27, "Toshkent", "Тошкент", 41.2995, 69.2401, ["Tashkent", "Ташкент"]),
+    Region(37, "Farg'ona", "Фарғона", 40.3864, 71.7864, ["Fergana", "Фергана"]),
+    Region(74, "Termiz", "Термиз", 37.2242, 67.2783, ["Termez", "Термез"]),
+]
+
+_BY_ID = {region.id: region for region in REGIONS}
+
+
+def fold(text: str) -> str:
+    """Lower-case ASCII key for a name in any spelling: "Qoʻqon", "Қўқон" -> "qoqon"."""
+    text = text.strip().lower()
+    return "".join(_TRANSLIT.get(ch, ch) for ch in text if ch not in _DROP)
+
+
+def _build_index():
+    """Sorted (key, region_id) pairs for every name of every region."""
+    entries = set()
+    for region in REGIONS:
+        for name in region.names():
+            entries.add((fold(name), region.id))
+    return sorted(entries)
+
+
+_INDEX = _build_index()
+_KEYS = [key for key, _ in _INDEX]
+
+
+def get(region_id: int) -> Region | None:
+    return _BY_ID.get(region_id)
+
+
+def search(query: str, limit: int = 5):
+    """
+    Regions matching query, best first: an ID, then names starting with the
+    query, then names that are close to it (typos, other transliterations).
+    """
+    query = str(query).strip()
+    if query.isdigit():
+        region = get(int(query))
+        return [region] if region else []
+
+    key = fold(query)
+    if not key:
+        return []
+    found = []
+
+    def add(region_id):
+        region = _BY_ID[region_id]
+        if region not in found:
+            found.append(region)
+
+    start = bisect.bisect_left(_KEYS, key)
+    for index in range(start, len(_INDEX)):
+        if not _KEYS[index].startswith(key):
+            break
+        add(_INDEX[index][1])
+
+    for close in difflib.get_close_matches(key, _KEYS, n=limit, cutoff=0.6):
+        index = bisect.bisect_left(_KEYS, close)
+        while index < len(_INDEX) and _KEYS[index] == close:
+            add(_INDEX[index][1])
+            index += 1
+    return found[:limit]
+
+
+def cities_in(text: str):
+    """
+    Regions whose name (any spelling) starts a word of text, e.g. the title
+    of a timetable PDF: "НАМАНГАН ШАҲРИ ..." -> [Namangan].
+    """
+    found = []
+    for word in re.split(r"[\s,;:()\[\]/|0-9]+", text):
+        key = fold(word)
+        if len(key) < 3:
+            continue
+        index = bisect.bisect_right(_KEYS, key)
+        # Every index key that key starts with sorts at or before key
+        while index > 0:
+            index -= 1
+            if _KEYS[index][0] != key[0]:
+                break
+            if key.startswith(_KEYS[index]):
+                region = _BY_ID[_INDEX[index][1]]
+                if region not in found:
+                    found.append(region)
+    return found
+
+
+def resolve(query) -> Region:
+    """
+    Exactly one region for an ID or name. Raises ValueError if nothing
+    matches or the name is ambiguous.
+    """
+    matches = search(query, limit=5)
+    if not matches:
+        raise ValueError(f"Unknown region: {query!r}")
+    exact = [r for r in matches if fold(str(query)) in (fold(n) for n in r.names())]
+    if len(exact) == 1 or len(matches) == 1:
+        return (exact or matches)[0]
+    names = ", ".join(f"{r.name} ({r.id})" for r in matches)
+    raise ValueError(f"Ambiguous region {query!r}: {names}")
+
+
+def _print_regions(regions):
+    for r in regions:
+        mark = "" if r.verified else "  (unverified)"
+        print(f"{r.id:>4}  {r.name:<12} {r.name_cyrillic:<12} {r.lat:8.4f} {r.lon:8.4f}{mark}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or search islom.uz regions.")
+    parser.add_argument("query", nargs="?", help="name (Latin or Cyrillic, prefix or approximate) or ID")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if not args.query:
+        _print_regions(REGIONS)
+        return 0
+    matches = search(args.query, limit=args.limit)
+    if not matches:
+        print(f"[regions] No region matches {args.query!r}")
+        return 1
+    _print_regions(matches)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
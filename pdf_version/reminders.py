@@ -0,0 +1,192 @@
+"""
+Pre-prayer reminders on top of a hierarchical timer wheel.
+
+Every reminder (e.g. "Asr in 15 min") becomes one timer. Timers live in a
+hierarchical wheel with minute resolution, so scheduling, cancelling and
+advancing one tick cost O(1) no matter how many reminders are pending
+across regions and users; nothing rescans the schedules.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+# (prayer, minutes before it). "Sunrise" reminders warn that Fajr is ending.
+# Reminders are opt-in: set scheduler.REMINDERS to this (or your own list).
+SUGGESTED_REMINDERS = [
+    ("Fajr", 15),
+    ("Fajr", 5),
+    ("Sunrise", 10),
+    ("Dhuhr", 15),
+    ("Dhuhr", 5),
+    ("Asr", 15),
+    ("Asr", 5),
+    ("Maghrib", 15),
+    ("Maghrib", 5),
+    ("Isha", 15),
+    ("Isha", 5),
+]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def minute_index(dt: datetime) -> int:
+    """Whole minutes since 1970-01-01 (naive local time, like the schedule)."""
+    return int((dt - _EPOCH).total_seconds() // 60)
+
+
+class Timer:
+    __slots__ = ("expires", "payload", "_slot")
+
+    def __init__(self, expires: int, payload):
+        self.expires = expires
+        self.payload = payload
+        self._slot = None  # set holding this timer while it is pending
+
+    @property
+    def pending(self) -> bool:
+        return self._slot is not None
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel.
+
+    Level 0 has one slot per tick, level 1 one slot per 64 ticks, and so on.
+    Timers far in the future sit in a coarse level and are cascaded down as
+    the wheel turns, so each timer is touched at most once per level.
+    """
+
+    def __init__(self, now: int, slots_per_level: int = 64, levels: int = 4):
+        self.now = now
+        self.size = slots_per_level
+        self.levels = [[set() for _ in range(slots_per_level)] for _ in range(levels)]
+        self.widths = [slots_per_level**i for i in range(levels)]
+        self._overdue = set()
+        self.pending = 0
+
+    def schedule(self, expires: int, payload) -> Timer:
+        timer = Timer(expires, payload)
+        self._insert(timer)
+        self.pending += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        if timer._slot is not None:
+            timer._slot.discard(timer)
+            timer._slot = None
+            self.pending -= 1
+
+    def _insert(self, timer: Timer):
+        delta = timer.expires - self.now
+        if delta <= 0:
+            slot = self._overdue
+        else:
+            for level, width in enumerate(self.widths):
+                if delta < width * self.size:
+                    slot = self.levels[level][(timer.expires // width) % self.size]
+                    break
+            else:
+                raise ValueError(f"timer {delta} ticks ahead is beyond the wheel span")
+        slot.add(timer)
+        timer._slot = slot
+
+    def _take(self, slot: set):
+        timers = list(slot)
+        slot.clear()
+        for timer in timers:
+            timer._slot = None
+        return timers
+
+    def advance(self, now: int):
+        """Move the wheel to tick `now`. Returns payloads of expired timers in order."""
+        expired = self._take(self._overdue)
+        while self.now < now:
+            self.now += 1
+            # Cascade coarser levels whose slot boundary we just crossed
+            for level in range(len(self.widths) - 1, 0, -1):
+                width = self.widths[level]
+                if self.now % width == 0:
+                    for timer in self._take(self.levels[level][(self.now // width) % self.size]):
+                        self._insert(timer)
+            expired.extend(self._take(self.levels[0][self.now % self.size]))
+            expired.extend(self._take(self._overdue))
+        self.pending -= len(expired)
+        expired.sort(key=lambda t: t.expires)
+        return [timer.payload for timer in expired]
+
+
+class Reminder:
+    __slots__ = ("owner", "prayer", "minutes_before", "prayer_time", "at")
+
+    def __init__(self, owner, prayer: str, minutes_before: int, prayer_time: str, at: datetime):
+        self.owner = owner
+        self.prayer = prayer
+        self.minutes_before = minutes_before
+        self.prayer_time = prayer_time
+        self.at = at
+
+    @property
+    def key(self) -> str:
+        """Key used for de-duplication, e.g. 'Asr-15m'."""
+        return f"{self.prayer}-{self.minutes_before}m"
+
+    def title(self) -> str:
+        if self.prayer == "Sunrise":
+            return f"    Fajr ends in {self.minutes_before} min"
+        return f"    {self.prayer} in {self.minutes_before} min"
+
+    def message(self) -> str:
+        if self.prayer == "Sunrise":
+            return f"Sunrise at {self.prayer_time}, pray Fajr before it"
+        return f"{self.prayer} prayer at {self.prayer_time}"
+
+
+class ReminderScheduler:
+    """
+    Reminders for any number of owners (e.g. (region_id, user, day)).
+    Each owner's reminders can be cancelled as a group.
+    """
+
+    def __init__(self, now: datetime):
+        self.wheel = TimerWheel(minute_index(now))
+        self._timers = defaultdict(list)  # owner -> [Timer]
+
+    def schedule_day(self, owner, day: date, schedule: dict, offsets, now: datetime) -> int:
+        """
+        Schedule every (prayer, minutes_before) reminder of one day's schedule
+        that is not in the past yet. Returns the number of reminders added.
+        """
+        current = minute_index(now)
+        added = 0
+        for prayer, minutes_before in offsets:
+            t = schedule.get(prayer)
+            if not t:
+                continue
+            hh, mm = map(int, t.split(":"))
+            at = datetime.combine(day, datetime.min.time()) + timedelta(
+                hours=hh, minutes=mm - minutes_before
+            )
+            expires = minute_index(at)
+            if expires < current:
+                continue
+            reminder = Reminder(owner, prayer, minutes_before, t, at)
+            self._timers[owner].append(self.wheel.schedule(expires, reminder))
+            added += 1
+        return added
+
+    def cancel(self, owner):
+        for timer in self._timers.pop(owner, []):
+            self.wheel.cancel(timer)
+
+    def due(self, now: datetime):
+        """Return reminders that became due up to now."""
+        fired = self.wheel.advance(minute_index(now))
+        for reminder in fired:
+            timers = self._timers.get(reminder.owner)
+            if timers is not None and not any(t.pending for t in timers):
+                del self._timers[reminder.owner]
+        return fired
+
+    @property
+    def pending(self) -> int:
+        return self.wheel.pending
@@ -2,42 +2,92 @@ import time
 import traceback
 import json
 import sys
+import threading
 from datetime import date, datetime, timedelta
 from pathlib import Path
+from . import clock
 from .notify_helper import notify
 from .pdf_parser import download_pdf, parse_pdf_to_json
 from .storage import get_month_paths
-from . import tmux_helper
+from .validation import normalize_times
+from . import (
+    archive,
+    reminders,
+    sd_notify,
+    shared_cache,
+    state_snapshot,
+    status_sinks,
+    storage,
+    watcher,
+)
 
 REGION_ID = 15  # Namangan (change if needed)
 CHECK_INTERVAL_SECONDS = 60  # main loop tick
 DOWNLOAD_RETRY_HOURS = 6  # if download fails, retry after this many hours
+DOWNLOAD_IN_BACKGROUND = True  # fetch months off the loop thread (ticks never wait on the network)
 MIN_PDF_SIZE_BYTES = 500
+REMINDERS = []  # (prayer, minutes before), e.g. reminders.SUGGESTED_REMINDERS
+REMINDER_SOUND = False  # path to a sound for reminders; False = silent
+REMINDER_EXPIRE_MS = 15000  # reminders auto-dismiss (prayer notifications stay)
+TICK_DEADLINE_SECONDS = 30  # a slower tick counts as a stall: no watchdog ping for it
+SHOW_COUNTDOWN = True  # "Asr 15:42 (in 23m)" in the status line
+COUNTDOWN_SECOND_RESOLUTION = True  # count down in seconds during the last minute
 
 DEFAULT_ICON = Path(__file__).resolve().parent.parent / "assets" / "mosque.png"
 
 _notified_for_today = set()  # set of prayer names already notified for current date
-
-
-def ensure_month_data(year: int, month: int) -> bool:
+_last_checked_date = None  # date seen by the previous tick
+_last_download_attempt = None  # datetime of the last download that has not succeeded
+_download_thread = None  # threading.Thread fetching a month in the background
+_healthy = False  # last tick finished within TICK_DEADLINE_SECONDS (gates WATCHDOG=1)
+_last_status = None  # what the last write_status call rendered (for the snapshot)
+_last_snapshot_core = None  # snapshot state last handed to state_snapshot
+_reminders = None  # reminders.ReminderScheduler, created on first use
+_reminders_for = None  # (owner, schedule items) the pending reminders were built from
+_watcher = None  # watcher.InotifyWatcher / PollingWatcher on the storage dir (+ shared region dir)
+_month_cache = {}  # (year, month) -> month data or None (missing), trusted while _watcher is running
+_cleaned_for = None  # (year, month) cleanup_old_month_files last ran for
+_last_write_args = None  # arguments of the last write_status call
+_last_sd_status = None  # last STATUS= text sent to systemd
+
+
+def ensure_month_data(year: int, month: int, download: bool = True) -> bool:
     """
     Ensure that JSON for the requested month exists.
     Returns True if JSON available (exists after possible download+parse).
-    If download/parse fails, returns False.
+    If download/parse fails (or download is False and the JSON is
+    missing), returns False.
     """
+    # Loaded (or known missing) and unchanged on disk since: the watcher
+    # would have told us
+    if _watcher is not None and (year, month) in _month_cache:
+        if _month_cache[(year, month)] is not None:
+            return True
+        if not download:
+            return False
+
     pdf_path, json_path = get_month_paths(year, month)
 
     # If json already exists and non-empty -> OK
     if json_path.exists() and json_path.stat().st_size > 0:
         return True
 
+    if not download:
+        if _watcher is not None:
+            _month_cache[(year, month)] = None
+        return False
+
     # Try to download the PDF (if missing) and parse it
+    _month_cache.pop((year, month), None)
     try:
+        if storage.SHARED_DIR is not None:
+            # One download + parse per host, other users just copy the JSON
+            return shared_cache.fetch_month(REGION_ID, year, month)
         if not pdf_path.exists() or pdf_path.stat().st_size < MIN_PDF_SIZE_BYTES:
             print(f"[scheduler] downloading PDF for {year}-{month:02d}...")
             download_pdf(REGION_ID, year, month)
         print(f"[scheduler] parsing PDF -> JSON for {year}-{month:02d} ...")
-        parse_pdf_to_json(pdf_path)
+        parse_pdf_to_json(pdf_path, region_id=REGION_ID)
         # parse_pdf_to_json writes the JSON file itself
         return True
     except Exception as e:
@@ -47,13 +97,144 @@ def ensure_month_data(year: int, month: int) -> bool:
 
 
 def load_month_data(year: int, month: int):
+    key = (year, month)
+    if _watcher is not None and key in _month_cache:
+        return _month_cache[key]
     _, json_path = get_month_paths(year, month)
-    if not json_path.exists():
-        return None
     try:
-        return json.loads(json_path.read_text())
+        data = normalize_times(json.loads(json_path.read_text()))
     except Exception:
+        data = None  # missing or unreadable
+    if _watcher is not None:
+        # Missing months are cached too (as None): the fallback scan and
+        # tomorrow's-Fajr lookups must not hit the disk every tick either
+        _month_cache[key] = data
+    return data
+
+
+def _shared_region_dir():
+    """SHARED_DIR/<REGION_ID> if the shared cache is in use and the directory exists."""
+    if storage.SHARED_DIR is None:
         return None
+    region_dir = storage.SHARED_DIR / str(REGION_ID)
+    if shared_cache.is_writable(REGION_ID):
+        shared_cache.make_region_dir(region_dir)
+    return region_dir if region_dir.is_dir() else None
+
+
+def start_watching():
+    """
+    Watch the storage directory (and this region's shared cache directory)
+    so month data can stay in memory between ticks; it is dropped only when
+    the watcher reports a change.
+    """
+    global _watcher
+    storage.BASE_DIR.mkdir(parents=True, exist_ok=True)
+    _month_cache.clear()
+    directories = [storage.BASE_DIR]
+    shared_dir = _shared_region_dir()
+    if shared_dir is not None:
+        directories.append(shared_dir)
+    elif storage.SHARED_DIR is not None:
+        print(f"[scheduler] {storage.SHARED_DIR / str(REGION_ID)} missing, watching it once it exists")
+    _watcher = watcher.watch(*directories)
+
+
+def stop_watching():
+    global _watcher
+    if _watcher is not None:
+        _watcher.close()
+    _watcher = None
+    _month_cache.clear()
+
+
+def apply_file_changes() -> bool:
+    """
+    Drop cached months whose JSON changed on disk, and re-copy months that
+    changed in the shared cache. Returns True if anything changed.
+    """
+    global _cleaned_for, _last_download_attempt
+    if _watcher is None:
+        return False
+    changed = _watcher.poll()
+    if not changed:
+        return False
+    watched = _watcher.directories
+    if any(path in watched for path in changed):
+        # A watched directory itself went away: start over with a fresh watch
+        print("[scheduler] Storage directory replaced, re-watching")
+        stop_watching()
+        start_watching()
+    elif storage.SHARED_DIR is not None and len(watched) == 1 and _shared_region_dir():
+        # The shared region directory appeared (first month copied from it)
+        stop_watching()
+        start_watching()
+    today = clock.today()
+    next_month = today.replace(day=28) + timedelta(days=4)
+    wanted = {(today.year, today.month), (next_month.year, next_month.month)}
+    for path in changed:
+        try:
+            year, month = map(int, path.name[:7].split("-"))
+        except ValueError:
+            continue
+        if path.parent != storage.BASE_DIR:
+            # Shared cache: refresh our copy if we have one (its own
+            # change event then reloads it)
+            _, local_json = get_month_paths(year, month)
+            if local_json.exists():
+                shared_cache.refresh_local(REGION_ID, year, month)
+            elif (year, month) in wanted and shared_cache.fetch_month(
+                REGION_ID, year, month, download=False
+            ):
+                # Someone else filled a month we are waiting for (we may be a
+                # read-only consumer): no need to wait out the retry delay
+                _last_download_attempt = None
+        _month_cache.pop((year, month), None)
+    _cleaned_for = None
+    names = ", ".join(sorted(str(path) for path in changed))
+    print(f"[scheduler] Reloading after change on disk: {names}")
+    return True
+
+
+def download_in_progress() -> bool:
+    return _download_thread is not None and _download_thread.is_alive()
+
+
+def _download_month(year: int, month: int):
+    global _last_download_attempt
+    if ensure_month_data(year, month):
+        _last_download_attempt = None
+
+
+def start_download(year: int, month: int) -> bool:
+    """
+    Fetch a missing month, at most once per DOWNLOAD_RETRY_HOURS and one at
+    a time. Runs in a background thread (see DOWNLOAD_IN_BACKGROUND); the
+    watcher picks up the new JSON when it lands. Returns True if started.
+    """
+    global _download_thread, _last_download_attempt
+    if download_in_progress():
+        return False
+    if (
+        _last_download_attempt is not None
+        and (clock.now() - _last_download_attempt).total_seconds()
+        < DOWNLOAD_RETRY_HOURS * 3600
+    ):
+        return False
+
+    print(f"[scheduler] Downloading data for {year}-{month:02d}...")
+    # Persist the attempt first: if this process dies mid-download, a
+    # restart must not retry straight away
+    _last_download_attempt = clock.now()
+    save_state()
+    if not DOWNLOAD_IN_BACKGROUND:
+        _download_month(year, month)
+        return True
+    _download_thread = threading.Thread(
+        target=_download_month, args=(year, month), name="month-download", daemon=True
+    )
+    _download_thread.start()
+    return True
 
 
 def get_schedule_for_date(dt: date):
@@ -81,42 +262,125 @@ def get_next_prayer_from_schedule(schedule: dict):
     """Return (name, time_str) or None if schedule is None."""
     if not schedule:
         return None
-    now = datetime.now()
-    now_minutes = now.hour * 60 + now.minute
+    # Times are zero-padded HH:MM (validated at ingest, padded again on load
+    # for older JSON), so string order is time order
+    now_str = clock.now().strftime("%H:%M")
     for name in ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]:
         t = schedule.get(name)
-        if not t:
-            continue
-        hh, mm = map(int, t.split(":"))
-        t_minutes = hh * 60 + mm
-        if t_minutes > now_minutes:
+        if t and t > now_str:
             return name, t
     # all passed → try tomorrow's Fajr
-    tomorrow = date.today() + timedelta(days=1)
+    tomorrow = clock.today() + timedelta(days=1)
     sched_tom = get_schedule_for_date(tomorrow)
     if sched_tom and "Fajr" in sched_tom:
         return "Fajr", sched_tom["Fajr"]
     return None
 
 
+def get_prayer_window(schedule: dict):
+    """
+    Return the current prayer window and the countdown to the next prayer:
+    {
+        "current": "Dhuhr",          # Isha (of yesterday) before Fajr
+        "current_until": "15:42",
+        "next": "Asr",
+        "next_time": "15:42",
+        "seconds_left": 1380,
+    }
+    or None if the next prayer is unknown.
+    """
+    name_time = get_next_prayer_from_schedule(schedule)
+    if not name_time:
+        return None
+    next_name, next_time = name_time
+
+    now = clock.now()
+    now_str = now.strftime("%H:%M")
+    current = "Isha"  # before Fajr we are still in last night's Isha
+    for name in ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]:
+        t = schedule.get(name)
+        if t and t <= now_str:
+            current = name
+
+    hh, mm = int(next_time[:2]), int(next_time[3:])
+    next_dt = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    if next_time <= now_str:
+        next_dt += timedelta(days=1)  # tomorrow's Fajr
+    return {
+        "current": current,
+        "current_until": next_time,
+        "next": next_name,
+        "next_time": next_time,
+        "seconds_left": max(0, int((next_dt - now).total_seconds())),
+    }
+
+
+def format_countdown(seconds: int) -> str:
+    """1380 -> '23m', 3900 -> '1h 05m', 42 -> '42s' (last minute, if enabled)."""
+    if seconds < 60 and COUNTDOWN_SECOND_RESOLUTION:
+        return f"{seconds}s"
+    minutes = -(-seconds // 60)  # round up: "1m" until the prayer starts
+    if minutes >= 60:
+        return f"{minutes // 60}h {minutes % 60:02d}m"
+    return f"{minutes}m"
+
+
+def next_update_delay():
+    """
+    Seconds until the status next changes visibly, and whether that moment
+    needs a full tick (minute boundary) or only a countdown refresh (seconds
+    in the last minute before a prayer).
+    """
+    now = clock.now()
+    into_minute = now.second + now.microsecond / 1_000_000
+    to_boundary = CHECK_INTERVAL_SECONDS - into_minute % CHECK_INTERVAL_SECONDS
+
+    if SHOW_COUNTDOWN and COUNTDOWN_SECOND_RESOLUTION and _last_write_args:
+        window = get_prayer_window(_last_write_args[0]) if _last_write_args[0] else None
+        if window and window["seconds_left"] <= 60:
+            to_second = 1 - now.microsecond / 1_000_000
+            if to_second < to_boundary - 0.001:
+                return to_second, False
+    return to_boundary, True
+
+
+def refresh_status():
+    """Re-render the last status (countdown only); no data access."""
+    if _last_write_args:
+        write_status(*_last_write_args)
+
+
 def write_status(
     schedule_today, offline=False, using_stale_data=False, stale_date=None
 ):
-    """Write the short one-line status and full-day file for tmux popup."""
+    """
+    Render the status once and publish it to every enabled sink
+    (tmux files by default, see status_sinks). Unchanged output is not rewritten.
+    """
+    global _last_status, _last_write_args, _last_sd_status
+    _last_write_args = (schedule_today, offline, using_stale_data, stale_date)
+    name_time = None
+    window = None
     if schedule_today:
-        name_time = get_next_prayer_from_schedule(schedule_today)
-        if name_time:
+        window = get_prayer_window(schedule_today)
+        if window:
+            name_time = window["next"], window["next_time"]
             name, t = name_time
+            countdown = (
+                f" (in {format_countdown(window['seconds_left'])})" if SHOW_COUNTDOWN else ""
+            )
             if using_stale_data and stale_date:
                 # Show indicator for stale data with date
-                short = f"● {name} {t} ({stale_date.strftime('%b %d')}) 󰥔 "
+                short = f"● {name} {t}{countdown} ({stale_date.strftime('%b %d')}) 󰥔 "
             elif using_stale_data:
-                short = f"● {name} {t} 󰥔 "
+                short = f"● {name} {t}{countdown} 󰥔 "
             else:
-                short = f"{name} {t} 󰥔 "
+                short = f"{name} {t}{countdown} 󰥔 "
         else:
             short = "No upcoming (all passed)"
         full = format_full_day(schedule_today, is_stale=using_stale_data)
+        if window:
+            full = f"Now: {window['current']} until {window['current_until']}\n\n{full}"
     else:
         if offline:
             short = "● Offline: no data"
@@ -124,8 +388,49 @@ def write_status(
         else:
             short = "Loading...🌀"
             full = "No prayer schedule available yet."
-    tmux_helper.write_next_prayer(short)
-    tmux_helper.write_full_day(full)
+
+    if not schedule_today:
+        css_class = "offline" if offline else "loading"
+    elif using_stale_data:
+        css_class = "stale"
+    else:
+        css_class = "ok" if name_time else "passed"
+    # Without a visible countdown, leave it out of the payload too: it
+    # changes every minute and would make every sink rewrite its output
+    countdown_window = window if SHOW_COUNTDOWN else None
+    changed = status_sinks.publish(
+        {
+            "text": short,
+            "tooltip": full,
+            "class": css_class,
+            "next_prayer": name_time[0] if name_time else None,
+            "next_time": name_time[1] if name_time else None,
+            "stale_date": stale_date.isoformat() if stale_date else None,
+            "current_prayer": window["current"] if window else None,
+            "current_until": window["current_until"] if window else None,
+            "seconds_left": countdown_window["seconds_left"] if countdown_window else None,
+            "countdown": (
+                format_countdown(countdown_window["seconds_left"]) if countdown_window else None
+            ),
+        }
+    )
+    if changed:
+        if name_time:
+            stale = " (stale data)" if using_stale_data else ""
+            sd_status = f"Next prayer: {name_time[0]} at {name_time[1]}{stale}"
+        else:
+            sd_status = short
+        if sd_status != _last_sd_status:
+            sd_notify.status(sd_status)
+            _last_sd_status = sd_status
+    # Rendered strings change every minute (countdown); the snapshot keeps
+    # only what they are derived from
+    _last_status = {
+        "schedule": schedule_today,
+        "offline": offline,
+        "using_stale_data": using_stale_data,
+        "stale_date": stale_date.isoformat() if stale_date else None,
+    }
 
 
 def send_notification_if_needed(schedule_today):
@@ -137,8 +442,8 @@ def send_notification_if_needed(schedule_today):
     if not schedule_today:
         return
 
-    now_str = datetime.now().strftime("%H:%M")
-    today_key = date.today().isoformat()
+    now_str = clock.now().strftime("%H:%M")
+    today_key = clock.today().isoformat()
 
     # If date changed we should have reset notifications elsewhere.
     for name, t in schedule_today.items():
@@ -148,25 +453,144 @@ def send_notification_if_needed(schedule_today):
         if t == now_str:
             key = f"{today_key}|{name}"
             if key not in _notified_for_today:
-                # send notification
+                # persist before notifying: notify() blocks while the sound
+                # plays, and a restart meanwhile must not re-notify
+                _notified_for_today.add(key)
+                save_state()
                 title = f"    Prayer Reminder for {name}"
                 message = f"It's time for {name} prayer ( {t} )"
                 notify(title, message, icon=DEFAULT_ICON)
-                _notified_for_today.add(key)
                 # after notifying, update next-prayer text
                 write_status(schedule_today)
                 print(f"[scheduler] Notified for {name} at {t}")
 
+    send_reminders_if_needed(schedule_today)
+
+
+def _schedule_reminders(schedule_today):
+    """(Re)build today's reminder timers when the day or its schedule changes."""
+    global _reminders, _reminders_for
+    now = clock.now()
+    if _reminders is None:
+        _reminders = reminders.ReminderScheduler(now)
+
+    owner = (REGION_ID, clock.today().isoformat())
+    wanted = (owner, tuple(sorted(schedule_today.items())))
+    if wanted == _reminders_for:
+        return
+    if _reminders_for is not None:
+        _reminders.cancel(_reminders_for[0])
+    _reminders_for = wanted
+    count = _reminders.schedule_day(owner, clock.today(), schedule_today, REMINDERS, now)
+    print(f"[scheduler] Scheduled {count} reminder(s) for {owner[1]}")
+
+
+def send_reminders_if_needed(schedule_today):
+    """
+    Fire pre-prayer reminders (REMINDERS offsets) that are due.
+    Reminders share the notified set with prayer notifications, so they are
+    never repeated and survive restarts through the snapshot.
+    """
+    if not schedule_today or not REMINDERS:
+        return
+
+    _schedule_reminders(schedule_today)
+    today_key = clock.today().isoformat()
+    for reminder in _reminders.due(clock.now()):
+        key = f"{today_key}|{reminder.key}"
+        if key in _notified_for_today:
+            continue
+        _notified_for_today.add(key)
+        save_state()
+        notify(
+            reminder.title(),
+            reminder.message(),
+            sound=REMINDER_SOUND,
+            urgency="normal",
+            icon=DEFAULT_ICON,
+            expire_time=REMINDER_EXPIRE_MS,
+        )
+        print(f"[scheduler] Reminder: {reminder.title().strip()} ({reminder.prayer_time})")
+
 
 def clear_notifications_for_new_day():
     global _notified_for_today
     _notified_for_today = set()
 
 
+def save_state():
+    """
+    Snapshot the derived state (timeline, notified set, last status, cache
+    validators) so a restarted daemon can pick up where it left off.
+    Only touches the disk when something changed.
+    """
+    global _last_snapshot_core
+    today = clock.today()
+    core = {
+        "date": today.isoformat(),
+        "region_id": REGION_ID,
+        "notified": sorted(_notified_for_today),
+        "status": _last_status,
+        "last_download_attempt": (
+            _last_download_attempt.isoformat() if _last_download_attempt else None
+        ),
+    }
+    if core == _last_snapshot_core:
+        return
+    _last_snapshot_core = core
+
+    _, json_path = get_month_paths(today.year, today.month)
+    validators = {json_path.name: state_snapshot.file_validator(json_path)}
+    state_snapshot.save_snapshot({**core, "validators": validators})
+
+
+def restore_state() -> bool:
+    """
+    Restore today's state from the snapshot written by save_state().
+    The notified set is always restored for the same day (no duplicate
+    notifications after a restart); the status is re-rendered immediately
+    only if the month JSON it was derived from is unchanged.
+    Returns True if a status was rendered (the service is ready); False
+    if there was no usable snapshot or its status had to be discarded.
+    """
+    global _notified_for_today, _last_checked_date, _last_download_attempt
+    snap = state_snapshot.load_snapshot()
+    today = clock.today()
+    if (
+        not snap
+        or snap.get("date") != today.isoformat()
+        or snap.get("region_id") != REGION_ID
+    ):
+        return False
+
+    _notified_for_today = set(snap.get("notified", []))
+    _last_checked_date = today
+    if snap.get("last_download_attempt"):
+        _last_download_attempt = datetime.fromisoformat(snap["last_download_attempt"])
+
+    status = snap.get("status")
+    _, json_path = get_month_paths(today.year, today.month)
+    validators = snap.get("validators", {})
+    if status and validators.get(json_path.name) == state_snapshot.file_validator(
+        json_path
+    ):
+        stale_date = status.get("stale_date")
+        write_status(
+            status.get("schedule"),
+            offline=status.get("offline", False),
+            using_stale_data=status.get("using_stale_data", False),
+            stale_date=date.fromisoformat(stale_date) if stale_date else None,
+        )
+        return True
+    print("[scheduler] Snapshot data is outdated, status will be rebuilt")
+    return False
+
+
 def cleanup_old_month_files(current_year, current_month):
     """
     Remove previous month files (PDF + JSON) to avoid accumulating storage.
-    Keep only current month files.
+    Keep only current month files. JSONs are compacted into the history
+    archive first (see archive.py).
     **ONLY call this after successfully downloading current month data**
     """
     base_pdf, base_json = get_month_paths(current_year, current_month)
@@ -177,11 +601,13 @@ def cleanup_old_month_files(current_year, current_month):
         try:
             if f == base_pdf or f == base_json:
                 continue
-            # only remove pdf or json files with YYYY-MM prefix
-            if f.suffix in (".pdf", ".json"):
+            # only remove pdf, json or rejected pdf files with YYYY-MM prefix
+            if f.suffix in (".pdf", ".json", ".rejected"):
                 # optional safety: only delete if name matches pattern YYYY-MM.*
-                name = f.stem  # e.g. "2025-12"
+                name = f.stem  # e.g. "2025-12" ("2025-12.pdf" if rejected)
                 if len(name) >= 7 and name[4] == "-":
+                    if f.suffix == ".json" and not archive.retire_json(REGION_ID, f):
+                        continue
                     f.unlink(missing_ok=True)
                     deleted_count += 1
         except Exception:
@@ -196,7 +622,7 @@ def find_most_recent_available_data():
     Returns (year, month, date_obj) or None.
     Checks current month, then goes backwards up to 3 months.
     """
-    today = date.today()
+    today = clock.today()
     for i in range(4):  # Check current + 3 previous months
         check_date = today - timedelta(days=i * 30)
         data = load_month_data(check_date.year, check_date.month)
@@ -210,102 +636,174 @@ def find_most_recent_available_data():
     return None
 
 
+def tick():
+    """
+    Run one pass of the scheduler: make sure data is available, refresh the
+    status files and fire any notification due this minute.
+    Returns today's schedule (or None).
+    """
+    global _last_checked_date, _cleaned_for
+
+    today = clock.today()
+    year, month = today.year, today.month
+    if _last_checked_date is None:
+        _last_checked_date = today
+
+    apply_file_changes()
+
+    # If month JSON is missing, fetch it (in the background, rate limited
+    # by DOWNLOAD_RETRY_HOURS) and use the fallback meanwhile
+    ok = ensure_month_data(year, month, download=False)
+    if not ok and start_download(year, month) and not DOWNLOAD_IN_BACKGROUND:
+        ok = ensure_month_data(year, month, download=False)
+
+    if ok:
+        # Successfully have current month data
+        schedule_today = get_schedule_for_date(today)
+
+        if schedule_today is None:
+            # Current month JSON exists but today's entry is missing (very rare)
+            # This could happen if PDF was corrupted or parsing failed for specific dates
+            print(
+                f"[scheduler] Warning: Current month data exists but no entry for {today}"
+            )
+            write_status(None, offline=True)
+        else:
+            # Normal case: we have current data
+            write_status(schedule_today, offline=False, using_stale_data=False)
+
+        # Only cleanup old files AFTER successfully getting new data
+        # (once per month, or again after files changed on disk)
+        if _cleaned_for != (year, month):
+            cleanup_old_month_files(year, month)
+            _cleaned_for = (year, month)
+
+    else:
+        # Failed to get current month data - try to use stale data
+        print("[scheduler] Could not get current month data, using fallback...")
+
+        # Try to find the most recent available data
+        fallback = find_most_recent_available_data()
+
+        if fallback:
+            fb_year, fb_month, fb_date = fallback
+            print(f"[scheduler] Using data from {fb_year}-{fb_month:02d}")
+
+            # Try to get today's data from old month (might work if it's early in new month)
+            schedule_today = get_schedule_for_date(today)
+
+            if schedule_today is None:
+                # Use the last available date from the old month
+                schedule_today = get_schedule_for_date(fb_date)
+                stale_date = fb_date
+            else:
+                # Today's date exists in old month (early in new month case)
+                stale_date = today
+
+            write_status(
+                schedule_today,
+                offline=True,
+                using_stale_data=True,
+                stale_date=stale_date,
+            )
+        else:
+            # No data at all ("Loading..." while the first download runs)
+            schedule_today = None
+            write_status(None, offline=not download_in_progress())
+
+    # If day changed since last loop, reset notified set
+    if today != _last_checked_date:
+        _last_checked_date = today
+        clear_notifications_for_new_day()
+
+    # Send notifications if any prayer matches current minute
+    # (even with stale data, times might still be useful)
+    send_notification_if_needed(schedule_today)
+
+    save_state()
+
+    return schedule_today
+
+
+def idle(seconds: float):
+    """
+    Sleep between ticks. Under a systemd watchdog the sleep is cut into
+    slices and WATCHDOG=1 is sent after each one while the last tick was
+    healthy: waiting is not a stall, but a late or failing tick stops the
+    pings until a tick completes on time again.
+    Returns True early when the watcher reports a changed month file, so
+    external updates show up right away.
+    """
+    interval = sd_notify.watchdog_interval()
+    step = interval / 2 if interval else seconds
+    use_watcher = _watcher is not None and isinstance(clock.get_clock(), clock.SystemClock)
+    while seconds > 0:
+        chunk = min(step, seconds)
+        if use_watcher:
+            woke = _watcher.wait(chunk)
+        else:
+            clock.sleep(chunk)
+            woke = False
+        seconds -= chunk
+        if interval and _healthy:
+            sd_notify.watchdog()
+        if woke:
+            return True
+    return False
+
+
 def main_loop():
     """
     Main scheduler loop. Run forever.
     """
+    global _healthy
+    if "stdout" in status_sinks.enabled_sinks():
+        # stdout carries the JSON status stream; logs go to stderr
+        status_sinks.claim_stdout()
     print("[scheduler] Starting scheduler loop.")
-    last_checked_date = date.today()
-    last_download_attempt = None  # datetime of last failed attempt
+    ready = False
+    start_watching()
 
+    started = time.perf_counter()
+    try:
+        if restore_state():
+            # Status files are written: ready before the first tick
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"[scheduler] Warm start from snapshot in {elapsed_ms:.1f} ms")
+            ready = sd_notify.ready()
+    except Exception as e:
+        print(f"[scheduler] Could not restore snapshot: {e}", file=sys.stderr)
+
+    full_tick = True
     while True:
         try:
-            today = date.today()
-            year, month = today.year, today.month
-
-            # If month JSON is missing try to ensure it.
-            ok = ensure_month_data(year, month)
-
-            if ok:
-                # Successfully have current month data
-                schedule_today = get_schedule_for_date(today)
-
-                if schedule_today is None:
-                    # Current month JSON exists but today's entry is missing (very rare)
-                    # This could happen if PDF was corrupted or parsing failed for specific dates
-                    print(
-                        f"[scheduler] Warning: Current month data exists but no entry for {today}"
-                    )
-                    write_status(None, offline=True)
-                else:
-                    # Normal case: we have current data
-                    write_status(schedule_today, offline=False, using_stale_data=False)
-
-                # Only cleanup old files AFTER successfully getting new data
-                cleanup_old_month_files(year, month)
+            if not full_tick:
+                # Last minute before a prayer: only the countdown changes
+                refresh_status()
+                delay, full_tick = next_update_delay()
+                full_tick = idle(delay) or full_tick
+                continue
+
+            tick_started = time.monotonic()
+            tick()
+            tick_seconds = time.monotonic() - tick_started
 
+            if not ready:
+                # First status is on disk: tell systemd we are up
+                ready = sd_notify.ready()
+            _healthy = tick_seconds <= TICK_DEADLINE_SECONDS
+            if _healthy:
+                sd_notify.watchdog()
             else:
-                # Failed to get current month data - try to use stale data
-                print("[scheduler] Could not get current month data, using fallback...")
-
-                # Try to find the most recent available data
-                fallback = find_most_recent_available_data()
-
-                if fallback:
-                    fb_year, fb_month, fb_date = fallback
-                    print(f"[scheduler] Using data from {fb_year}-{fb_month:02d}")
-
-                    # Try to get today's data from old month (might work if it's early in new month)
-                    schedule_today = get_schedule_for_date(today)
-
-                    if schedule_today is None:
-                        # Use the last available date from the old month
-                        schedule_today = get_schedule_for_date(fb_date)
-                        stale_date = fb_date
-                    else:
-                        # Today's date exists in old month (early in new month case)
-                        stale_date = today
-
-                    write_status(
-                        schedule_today,
-                        offline=True,
-                        using_stale_data=True,
-                        stale_date=stale_date,
-                    )
-                else:
-                    # No data at all
-                    schedule_today = None
-                    write_status(None, offline=True)
-
-                # Retry policy: attempt redownload every DOWNLOAD_RETRY_HOURS
-                if (
-                    last_download_attempt is None
-                    or (datetime.now() - last_download_attempt).total_seconds()
-                    > DOWNLOAD_RETRY_HOURS * 3600
-                ):
-                    print("[scheduler] Attempting to re-download current month data...")
-                    last_download_attempt = datetime.now()
-                    ok2 = ensure_month_data(year, month)
-                    if ok2:
-                        # fresh data arrived → reload
-                        schedule_today = get_schedule_for_date(today)
-                        cleanup_old_month_files(year, month)
-                        clear_notifications_for_new_day()
-                        write_status(
-                            schedule_today, offline=False, using_stale_data=False
-                        )
-
-            # If day changed since last loop, reset notified set
-            if today != last_checked_date:
-                last_checked_date = today
-                clear_notifications_for_new_day()
-
-            # Send notifications if any prayer matches current minute
-            # (even with stale data, times might still be useful)
-            send_notification_if_needed(schedule_today)
-
-            # Sleep until next tick
-            time.sleep(CHECK_INTERVAL_SECONDS)
+                print(
+                    f"[scheduler] Tick took {tick_seconds:.0f}s "
+                    f"(deadline {TICK_DEADLINE_SECONDS}s), watchdog not fed",
+                    file=sys.stderr,
+                )
+
+            # Sleep until the next minute boundary (or second, near a prayer)
+            delay, full_tick = next_update_delay()
+            full_tick = idle(delay) or full_tick
 
         except KeyboardInterrupt:
             print("[scheduler] Interrupted by user, exiting.")
@@ -313,8 +811,12 @@ def main_loop():
         except Exception as e:
             print(f"[scheduler] Unexpected error: {e}", file=sys.stderr)
             traceback.print_exc()
+            # No pings until a tick succeeds again: a loop that keeps
+            # failing is as dead as a stuck one
+            _healthy = False
             # Sleep a bit on error to avoid tight crash loops
-            time.sleep(30)
+            idle(30)
+            full_tick = True
 
 
 if __name__ == "__main__":
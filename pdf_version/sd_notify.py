@@ -0,0 +1,72 @@
+"""
+Minimal sd_notify(3) client for running under systemd with Type=notify.
+
+Every function is a no-op when NOTIFY_SOCKET is not set, so the scheduler
+behaves the same when started by hand.
+"""
+
+import os
+import socket
+
+_socket = None
+
+
+def _address():
+    address = os.environ.get("NOTIFY_SOCKET")
+    if not address:
+        return None
+    if address.startswith("@"):
+        # Abstract namespace socket
+        return "\0" + address[1:]
+    return address
+
+
+def notify(*states: str) -> bool:
+    """
+    Send one or more state lines (e.g. "READY=1", "STATUS=...") to systemd.
+    Returns True if the message was sent.
+    """
+    global _socket
+    address = _address()
+    if not address:
+        return False
+    try:
+        if _socket is None:
+            _socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC)
+        _socket.sendto("\n".join(states).encode(), address)
+        return True
+    except OSError as e:
+        print(f"[sd_notify] Failed to notify systemd: {e}")
+        return False
+
+
+def watchdog_interval():
+    """
+    Seconds between required WATCHDOG=1 pings (WatchdogSec=), or None if
+    the watchdog is not enabled for this process.
+    """
+    usec = os.environ.get("WATCHDOG_USEC")
+    if not usec or not _address():
+        return None
+    pid = os.environ.get("WATCHDOG_PID")
+    if pid and int(pid) != os.getpid():
+        return None
+    try:
+        return int(usec) / 1_000_000
+    except ValueError:
+        return None
+
+
+def ready(status: str | None = None) -> bool:
+    states = ["READY=1"]
+    if status:
+        states.append(f"STATUS={status}")
+    return notify(*states)
+
+
+def status(text: str) -> bool:
+    return notify(f"STATUS={text}")
+
+
+def watchdog() -> bool:
+    return notify("WATCHDOG=1")
@@ -0,0 +1,160 @@
+"""
+System-wide timetable cache shared between users on one host.
+
+Layout (SHARED_DIR is set with PRAYER_TIMES_SHARED_DIR):
+    SHARED_DIR/<region_id>/YYYY-MM.pdf
+    SHARED_DIR/<region_id>/YYYY-MM.json
+    SHARED_DIR/<region_id>/YYYY-MM.lock
+
+The first scheduler that needs a month takes an exclusive fcntl lock on the
+month's lock file, downloads and parses it; every other instance blocks on
+the lock and then just reads the finished JSON. Users without write access
+to SHARED_DIR are read-only consumers and never download.
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+from . import storage
+from .pdf_parser import download_pdf, parse_pdf_to_json
+
+MIN_PDF_SIZE_BYTES = 500
+FILE_MODE = 0o664  # group members may refresh the cache too
+DIR_MODE = 0o2775  # group-writable, setgid so new files keep the cache's group
+
+
+@contextmanager
+def locked(lock_path, exclusive: bool = True):
+    """Hold an fcntl lock on lock_path (created if we are allowed to)."""
+    try:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, FILE_MODE)
+    except PermissionError:
+        fd = os.open(lock_path, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def make_region_dir(region_dir):
+    """
+    Create a region directory that every group member can fill
+    (mkdir alone would apply our umask, typically leaving it 0755).
+    """
+    try:
+        region_dir.mkdir(parents=True)
+    except FileExistsError:
+        return
+    try:
+        region_dir.chmod(DIR_MODE)
+    except OSError:
+        pass
+
+
+def _has_json(json_path) -> bool:
+    try:
+        return json_path.stat().st_size > 0
+    except OSError:
+        return False
+
+
+def is_writable(region_id: int) -> bool:
+    """True if this user may download into the shared cache for region_id."""
+    region_dir = storage.SHARED_DIR / str(region_id)
+    if region_dir.exists():
+        return os.access(region_dir, os.W_OK)
+    return os.access(storage.SHARED_DIR, os.W_OK)
+
+
+def _read_shared_json(region_id: int, year: int, month: int):
+    """Return the shared JSON bytes, or None if the month is not cached yet."""
+    _, json_path, lock_path = storage.get_shared_month_paths(region_id, year, month)
+    if not _has_json(json_path):
+        return None
+    if lock_path.exists():
+        with locked(lock_path, exclusive=False):
+            return json_path.read_bytes()
+    # JSON is written with an atomic rename, so reading without a lock is safe
+    return json_path.read_bytes()
+
+
+def _fill_shared_month(region_id: int, year: int, month: int):
+    """Single-flight download + parse into the shared cache. Returns JSON bytes."""
+    pdf_path, json_path, lock_path = storage.get_shared_month_paths(
+        region_id, year, month
+    )
+    make_region_dir(pdf_path.parent)
+
+    with locked(lock_path, exclusive=True):
+        # Another process may have finished while we waited for the lock
+        if _has_json(json_path):
+            return json_path.read_bytes()
+
+        if not pdf_path.exists() or pdf_path.stat().st_size < MIN_PDF_SIZE_BYTES:
+            print(f"[shared cache] downloading {region_id}/{year}-{month:02d} ...")
+            download_pdf(region_id, year, month, cleanup=False, pdf_path=pdf_path)
+        print(f"[shared cache] parsing {region_id}/{year}-{month:02d} ...")
+        parse_pdf_to_json(pdf_path, cleanup=False, json_path=json_path)
+
+        for path in (pdf_path, json_path):
+            try:
+                path.chmod(FILE_MODE)
+            except OSError:
+                pass
+        return json_path.read_bytes()
+
+
+def fetch_month(region_id: int, year: int, month: int, download: bool = True) -> bool:
+    """
+    Make the month available in the local storage dir via the shared cache.
+    Returns True if the local JSON now exists.
+    Raises on download/parse failure (like ensure_month_data's cold path).
+
+    Args:
+        region_id: Region ID for islom.uz
+        year, month: The month to fetch
+        download: Fill the shared cache if the month is missing there;
+            False only copies a month that is already cached
+    """
+    data = _read_shared_json(region_id, year, month)
+    if data is None:
+        if not download:
+            return False
+        if not is_writable(region_id):
+            print(
+                f"[shared cache] {region_id}/{year}-{month:02d} not cached yet "
+                f"and {storage.SHARED_DIR} is read-only for this user"
+            )
+            return False
+        data = _fill_shared_month(region_id, year, month)
+    _write_local(region_id, year, month, data)
+    return True
+
+
+def _write_local(region_id: int, year: int, month: int, data: bytes):
+    # Local copy keeps every other code path (loading, fallback) unchanged
+    _, local_json = storage.get_month_paths(year, month)
+    tmp_path = local_json.with_name(f".{local_json.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(local_json)
+    print(f"[shared cache] {region_id}/{year}-{month:02d} copied to {local_json}")
+
+
+def refresh_local(region_id: int, year: int, month: int) -> bool:
+    """
+    Re-copy a month whose shared JSON changed (re-parse, bulk_fetch --force)
+    over the local copy. Never downloads. Returns True if the copy changed.
+    """
+    data = _read_shared_json(region_id, year, month)
+    if data is None:
+        return False
+    _, local_json = storage.get_month_paths(year, month)
+    try:
+        if local_json.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    _write_local(region_id, year, month, data)
+    return True
@@ -0,0 +1,341 @@
+"""
+Fast-forward simulation of the scheduler.
+
+Replays any date range against a virtual clock, with downloads, parsing,
+notifications and status files stubbed out, and reports every event fired
+together with its lateness. The wall time of the replay doubles as a
+throughput benchmark for the scheduler logic.
+
+Usage:
+    python -m pdf_version.simulate --start 2025-12-01 --end 2026-01-31
+    python -m pdf_version.simulate --start 2026-01-25 --end 2026-02-05 --fail-month 2026-02
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from . import clock, reminders, scheduler, state_snapshot, status_sinks, storage, tmux_helper
+
+PRAYER_ORDER = ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]
+
+# Enough bytes to get past the scheduler's MIN_PDF_SIZE_BYTES check
+FAKE_PDF_BYTES = b"%PDF-1.4\n" + b"%" * 600 + b"\n%%EOF\n"
+
+
+def synthetic_day(day: date, region_id: int = scheduler.REGION_ID) -> dict:
+    """
+    Return a plausible schedule for one day (roughly Fergana valley latitudes).
+    Times follow the seasons smoothly so day-to-day deltas look like real data.
+    """
+    doy = day.timetuple().tm_yday
+    summer = math.cos(2 * math.pi * (doy - 172) / 365.25)  # 1 = June, -1 = Dec
+    eot = 8 * math.sin(2 * math.pi * (doy - 80) / 365.25)
+    shift = region_id % 7 - 3  # different regions are a few minutes apart
+
+    sunrise = 375 - 90 * summer + shift
+    fajr = sunrise - 80 - 20 * summer
+    dhuhr = 745 - eot + shift
+    maghrib = 1112 + 88 * summer + shift
+    asr = dhuhr + (maghrib - dhuhr) * 0.62
+    isha = maghrib + 80 + 20 * summer
+
+    minutes = [fajr, sunrise, dhuhr, asr, maghrib, isha]
+    return {
+        name: f"{int(m) // 60:02d}:{int(m) % 60:02d}"
+        for name, m in zip(PRAYER_ORDER, minutes)
+    }
+
+
+def synthetic_month_data(
+    year: int, month: int, region_id: int = scheduler.REGION_ID
+) -> dict:
+    """Return a month of synthetic data in the same shape as parse_pdf_to_json."""
+    month_data = {}
+    day = date(year, month, 1)
+    while day.month == month:
+        month_data[day.isoformat()] = synthetic_day(day, region_id)
+        day += timedelta(days=1)
+    return month_data
+
+
+@contextlib.contextmanager
+def _patched(obj, **attrs):
+    """Temporarily replace attributes on a module."""
+    saved = {name: getattr(obj, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(obj, name, value)
+
+
+class _Discard:
+    """Write-only sink for quiet runs (no file or text buffer behind it)."""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _reset_scheduler_state():
+    scheduler._notified_for_today = set()
+    scheduler._last_checked_date = None
+    scheduler._last_download_attempt = None
+    scheduler._download_thread = None
+    scheduler._last_status = None
+    scheduler._last_snapshot_core = None
+    scheduler._reminders = None
+    scheduler._reminders_for = None
+    scheduler._cleaned_for = None
+    scheduler._last_write_args = None
+    scheduler._last_sd_status = None
+    scheduler.stop_watching()
+    state_snapshot.reset()
+    status_sinks.reset()
+
+
+def run_simulation(
+    start: date,
+    end: date,
+    region_id: int = scheduler.REGION_ID,
+    fail_months=(),
+    tick_seconds: int = scheduler.CHECK_INTERVAL_SECONDS,
+    phase_seconds: int = 0,
+    quiet: bool = True,
+    on_tick=None,
+    watch: bool = True,
+    on_event=None,
+    reminder_offsets=None,
+):
+    """
+    Drive scheduler.tick() from start 00:00 until end 23:59 on a virtual clock.
+
+    Args:
+        start: First simulated day
+        end: Last simulated day (inclusive)
+        region_id: Region used for synthetic data
+        fail_months: (year, month) pairs whose download always fails
+        tick_seconds: Virtual seconds slept between ticks
+        phase_seconds: Offset of the first tick from midnight
+        quiet: Swallow the scheduler's own log output
+        on_tick: Optional callback(tick_index) run after every tick
+        watch: Keep month data in memory behind a storage watcher, like main_loop
+        on_event: Optional callback(event) that receives each notification
+            instead of it being kept for the report (long runs that must not
+            accumulate events; the report then lists every prayer as missed)
+        reminder_offsets: Reminders to run with instead of scheduler.REMINDERS
+
+    Returns a report dict (see print_report).
+    """
+    fail_months = set(fail_months)
+    events = []
+    status_writes = [0]
+    downloads = []
+
+    def fake_download(region, year, month, *args, **kwargs):
+        downloads.append((year, month))
+        if (year, month) in fail_months:
+            raise RuntimeError(f"simulated download failure for {year}-{month:02d}")
+        pdf_path, _ = storage.get_month_paths(year, month)
+        pdf_path.write_bytes(FAKE_PDF_BYTES)
+        return pdf_path
+
+    def fake_parse(pdf_path, *args, **kwargs):
+        pdf_path = Path(pdf_path)
+        y, m = map(int, pdf_path.stem.split("-"))
+        if (y, m) in fail_months:
+            raise RuntimeError(f"simulated parse failure for {y}-{m:02d}")
+        month_data = synthetic_month_data(y, m, region_id)
+        _, json_path = storage.get_month_paths(y, m)
+        json_path.write_text(json.dumps(month_data, indent=2))
+        return month_data
+
+    def fake_notify(title, message, *args, **kwargs):
+        event = {"at": clock.now(), "title": title, "message": message}
+        if on_event:
+            on_event(event)
+        else:
+            events.append(event)
+
+    def fake_write(text):
+        status_writes[0] += 1
+
+    virtual = clock.VirtualClock(
+        datetime.combine(start, datetime.min.time()) + timedelta(seconds=phase_seconds)
+    )
+    stop_at = datetime.combine(end + timedelta(days=1), datetime.min.time())
+    ticks = 0
+
+    with tempfile.TemporaryDirectory(prefix="prayer-sim-") as tmp, contextlib.ExitStack() as stack:
+        stack.enter_context(_patched(storage, BASE_DIR=Path(tmp), SHARED_DIR=None))
+        stack.enter_context(
+            _patched(
+                scheduler,
+                download_pdf=fake_download,
+                parse_pdf_to_json=fake_parse,
+                notify=fake_notify,
+                DOWNLOAD_IN_BACKGROUND=False,  # deterministic: fetch within the tick
+                REMINDERS=(
+                    scheduler.REMINDERS if reminder_offsets is None else reminder_offsets
+                ),
+            )
+        )
+        stack.enter_context(
+            _patched(tmux_helper, write_next_prayer=fake_write, write_full_day=fake_write)
+        )
+        stack.enter_context(_patched(status_sinks, enabled_sinks=lambda: ["tmux"]))
+        if quiet:
+            stack.enter_context(contextlib.redirect_stdout(_Discard()))
+            stack.enter_context(contextlib.redirect_stderr(_Discard()))
+
+        previous_clock = clock.get_clock()
+        clock.set_clock(virtual)
+        _reset_scheduler_state()
+        if watch:
+            scheduler.start_watching()
+        wall_start = time.perf_counter()
+        try:
+            while virtual.now() < stop_at:
+                scheduler.tick()
+                ticks += 1
+                if on_tick:
+                    on_tick(ticks)
+                virtual.sleep(tick_seconds)
+        finally:
+            wall = time.perf_counter() - wall_start
+            clock.set_clock(previous_clock)
+            _reset_scheduler_state()
+
+    return _build_report(
+        start, end, region_id, fail_months, events, ticks, wall, status_writes[0], downloads
+    )
+
+
+def _build_report(
+    start, end, region_id, fail_months, events, ticks, wall, status_writes, downloads
+):
+    # Every prayer of every day with fresh data is expected to fire exactly once
+    expected = {}
+    day = start
+    while day <= end:
+        if (day.year, day.month) not in fail_months:
+            for name, t in synthetic_day(day, region_id).items():
+                hh, mm = map(int, t.split(":"))
+                expected[(day, name)] = datetime.combine(day, datetime.min.time()) + timedelta(
+                    hours=hh, minutes=mm
+                )
+        day += timedelta(days=1)
+
+    fired = []
+    seen = set()
+    reminders_fired = 0
+    for event in events:
+        if "Prayer Reminder for" not in event["title"]:
+            reminders_fired += 1
+            continue
+        name = event["title"].split()[-1]
+        key = (event["at"].date(), name)
+        due = expected.get(key)
+        lateness = (event["at"] - due).total_seconds() if due else None
+        fired.append({**event, "name": name, "due": due, "lateness": lateness})
+        seen.add(key)
+
+    missed = sorted(key for key in expected if key not in seen)
+    lateness = [e["lateness"] for e in fired if e["lateness"] is not None]
+
+    return {
+        "start": start,
+        "end": end,
+        "ticks": ticks,
+        "wall_seconds": wall,
+        "ticks_per_second": ticks / wall if wall else float("inf"),
+        "status_writes": status_writes,
+        "downloads": downloads,
+        "events": fired,
+        "reminders": reminders_fired,
+        "expected": len(expected),
+        "missed": missed,
+        "max_lateness": max(lateness) if lateness else None,
+        "mean_lateness": sum(lateness) / len(lateness) if lateness else None,
+    }
+
+
+def print_report(report: dict, show_events: bool = True):
+    if show_events:
+        for e in report["events"]:
+            late = f"{e['lateness']:+.0f}s" if e["lateness"] is not None else "unexpected"
+            print(f"{e['at']:%Y-%m-%d %H:%M:%S}  {e['name']:<8} {late:>10}  {e['message']}")
+        for day, name in report["missed"]:
+            print(f"{day}  {name:<8} {'MISSED':>10}")
+        print()
+
+    print(f"[simulate] Range:          {report['start']} .. {report['end']}")
+    print(f"[simulate] Ticks:          {report['ticks']}")
+    print(f"[simulate] Wall time:      {report['wall_seconds']:.2f}s")
+    print(f"[simulate] Throughput:     {report['ticks_per_second']:.0f} ticks/s")
+    print(f"[simulate] Status writes:  {report['status_writes']}")
+    print(f"[simulate] Downloads:      {len(report['downloads'])}")
+    print(f"[simulate] Events fired:   {len(report['events'])} / {report['expected']} expected")
+    print(f"[simulate] Missed:         {len(report['missed'])}")
+    print(f"[simulate] Reminders:      {report['reminders']}")
+    if report["max_lateness"] is not None:
+        print(
+            f"[simulate] Lateness:       mean {report['mean_lateness']:.1f}s, "
+            f"max {report['max_lateness']:.1f}s"
+        )
+
+
+def _parse_month(value: str):
+    y, m = value.split("-")
+    return int(y), int(m)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay the scheduler on a virtual clock.")
+    parser.add_argument("--start", type=date.fromisoformat, required=True)
+    parser.add_argument("--end", type=date.fromisoformat, required=True)
+    parser.add_argument("--region", type=int, default=scheduler.REGION_ID)
+    parser.add_argument(
+        "--fail-month",
+        type=_parse_month,
+        action="append",
+        default=[],
+        help="YYYY-MM whose download fails (repeatable)",
+    )
+    parser.add_argument("--tick", type=int, default=scheduler.CHECK_INTERVAL_SECONDS)
+    parser.add_argument("--phase", type=int, default=0, help="seconds after midnight of first tick")
+    parser.add_argument(
+        "--reminders",
+        action="store_true",
+        help="run with reminders.SUGGESTED_REMINDERS instead of scheduler.REMINDERS",
+    )
+    parser.add_argument("--summary", action="store_true", help="only print the summary")
+    parser.add_argument("--verbose", action="store_true", help="show scheduler log output")
+    args = parser.parse_args(argv)
+
+    report = run_simulation(
+        args.start,
+        args.end,
+        region_id=args.region,
+        fail_months=args.fail_month,
+        tick_seconds=args.tick,
+        phase_seconds=args.phase,
+        quiet=not args.verbose,
+        reminder_offsets=reminders.SUGGESTED_REMINDERS if args.reminders else None,
+    )
+    print_report(report, show_events=not args.summary)
+    return 1 if report["missed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Memory soak test for the long-running scheduler.
+
+Drives the scheduler through a simulated year (see simulate.py) at
+accelerated speed while sampling RSS and tracemalloc at intervals. After a
+warm-up period the first sample is the baseline; the run fails if RSS or
+traced Python memory grows by more than the allowed threshold, and prints
+the allocation sites that grew the most. RSS is reported without
+tracemalloc's own bookkeeping.
+
+RSS is compared with the first sample of the second half of the run instead:
+the allocator only returns whole arenas, so RSS ratchets up to the busiest
+tick seen so far (month rollovers load the new month and archive the old
+one) and settles after a few months. Growth after that is what a leak looks
+like; growth before it is the working set being reached.
+
+Allocation churn is measured too: for one simulated day after every sample,
+the tracemalloc peak is reset before each tick, so peak minus the starting
+level is what that tick allocated on top of what it kept. The run also fails
+if the mean over any window exceeds the churn limit.
+
+Usage:
+    python -m pdf_version.soak --days 365
+    python -m pdf_version.soak --start 2026-01-01 --days 90 --max-growth-kb 256
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import date, timedelta
+from . import clock, reminders, scheduler, simulate
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int:
+    """Resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class _DayCheck:
+    """
+    Checks each simulated day's prayer notifications as the day ends, so the
+    soak run itself keeps no per-event history that would look like growth.
+    """
+
+    def __init__(self, region_id: int):
+        self.region_id = region_id
+        self.day = None
+        self.seen = set()
+        self.fired = 0
+        self.reminders = 0
+        self.missed = []
+        self.max_lateness = 0.0
+
+    def on_event(self, event):
+        if "Prayer Reminder for" not in event["title"]:
+            self.reminders += 1
+            return
+        at = event["at"]
+        name = event["title"].split()[-1]
+        due = simulate.synthetic_day(at.date(), self.region_id).get(name)
+        if due:
+            hh, mm = map(int, due.split(":"))
+            lateness = (at - at.replace(hour=hh, minute=mm, second=0, microsecond=0)).total_seconds()
+            self.max_lateness = max(self.max_lateness, lateness)
+        self.seen.add(name)
+        self.fired += 1
+
+    def close_day(self, today):
+        if self.day is not None and today != self.day:
+            for name in simulate.synthetic_day(self.day, self.region_id):
+                if name not in self.seen:
+                    self.missed.append((self.day, name))
+            self.seen = set()
+        self.day = today
+
+
+def run_soak(
+    start: date,
+    days: int,
+    warmup_days: int = 3,
+    sample_days: int = 7,
+    max_growth_kb: int = 512,
+    top: int = 10,
+    frames: int = 1,
+    max_tick_churn_kb: float = 16,
+):
+    """
+    Run the soak test. Returns (passed, report dict).
+
+    Args:
+        start: First simulated day
+        days: Number of simulated days
+        warmup_days: Days to run before taking the baseline sample
+        sample_days: Simulated days between samples
+        max_growth_kb: Allowed growth of traced memory and RSS over the baseline
+        top: Number of allocation sites to report
+        frames: Traceback depth kept by tracemalloc (deeper is slower)
+        max_tick_churn_kb: Allowed mean transient allocation per tick
+    """
+    ticks_per_day = 24 * 60 * 60 // scheduler.CHECK_INTERVAL_SECONDS
+    warmup_ticks = warmup_days * ticks_per_day
+    sample_ticks = sample_days * ticks_per_day
+    last_tick = days * ticks_per_day
+    samples = []
+    baseline = {}
+    settled = {}  # first sample of the second half: the RSS baseline
+    final = {}
+    check = _DayCheck(scheduler.REGION_ID)
+    windows = []  # churn per sampled window
+    window = {}
+
+    def measure_churn():
+        """Account the tick that just ran, then re-arm the peak for the next one."""
+        traced, peak = tracemalloc.get_traced_memory()
+        if window.get("left"):
+            churn = peak - window["base"]
+            window["total"] += churn
+            window["max"] = max(window["max"], churn)
+            window["left"] -= 1
+            if not window["left"]:
+                ticks = window["ticks"]
+                windows.append(
+                    {
+                        "day": window["day"],
+                        "mean": window["total"] / ticks,
+                        "max": window["max"],
+                        "net": (traced - window["start"]) / ticks,
+                        "blocks": (sys.getallocatedblocks() - window["blocks"]) / ticks,
+                    }
+                )
+        tracemalloc.reset_peak()
+        window["base"] = traced
+
+    def start_window(tick):
+        traced, _ = tracemalloc.get_traced_memory()
+        window.update(
+            day=tick // ticks_per_day,
+            ticks=ticks_per_day,
+            left=ticks_per_day,
+            total=0,
+            max=0,
+            start=traced,
+            blocks=sys.getallocatedblocks(),
+            base=traced,
+        )
+        tracemalloc.reset_peak()
+
+    def on_tick(tick):
+        check.close_day(clock.today())
+        if window.get("left"):
+            measure_churn()
+        if tick == last_tick:
+            # Measure before run_simulation builds its report
+            gc.collect()
+            final["snapshot"] = tracemalloc.take_snapshot()
+            final["traced"], final["peak"] = tracemalloc.get_traced_memory()
+            final["rss"] = current_rss() - tracemalloc.get_tracemalloc_memory()
+            return
+        if tick < warmup_ticks or (tick - warmup_ticks) % sample_ticks:
+            return
+        gc.collect()
+        traced, _ = tracemalloc.get_traced_memory()
+        sample = {
+            "day": tick // ticks_per_day,
+            "rss": current_rss() - tracemalloc.get_tracemalloc_memory(),
+            "traced": traced,
+        }
+        if not baseline:
+            baseline["snapshot"] = tracemalloc.take_snapshot()
+            baseline.update(sample)
+        if not settled and tick >= last_tick // 2:
+            settled.update(sample)
+        samples.append(sample)
+        if last_tick - tick > ticks_per_day:
+            start_window(tick)
+
+    end = start + timedelta(days=days - 1)
+    tracemalloc.start(frames)
+    try:
+        # Reminders on, so the timer wheel is part of what is measured
+        report = simulate.run_simulation(
+            start,
+            end,
+            on_tick=on_tick,
+            on_event=check.on_event,
+            reminder_offsets=reminders.SUGGESTED_REMINDERS,
+        )
+        check.close_day(end + timedelta(days=1))
+    finally:
+        tracemalloc.stop()
+
+    limit = max_growth_kb * 1024
+    rss_base = settled or baseline
+    growth = {
+        "traced": final["traced"] - baseline.get("traced", final["traced"]),
+        "rss": final["rss"] - rss_base.get("rss", final["rss"]),
+    }
+    top_growth = []
+    if "snapshot" in baseline:
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        stats = final["snapshot"].filter_traces(filters).compare_to(
+            baseline["snapshot"].filter_traces(filters), "lineno"
+        )
+        top_growth = [s for s in stats if s.size_diff > 0][:top]
+
+    churn_limit = max_tick_churn_kb * 1024
+    worst = max(windows, key=lambda w: w["mean"], default=None)
+    passed = (
+        growth["traced"] <= limit
+        and growth["rss"] <= limit
+        and (worst is None or worst["mean"] <= churn_limit)
+    )
+    return passed, {
+        "days": days,
+        "ticks": report["ticks"],
+        "wall_seconds": report["wall_seconds"],
+        "ticks_per_second": report["ticks_per_second"],
+        "fired": check.fired,
+        "reminders": check.reminders,
+        "missed": check.missed,
+        "max_lateness": check.max_lateness,
+        "samples": samples,
+        "growth": growth,
+        "traced_since": baseline.get("day"),
+        "rss_since": rss_base.get("day"),
+        "traced_peak": final["peak"],
+        "limit": limit,
+        "top_growth": top_growth,
+        "churn": windows,
+        "churn_limit": churn_limit,
+    }
+
+
+def print_report(passed: bool, report: dict, top_missed: int = 10):
+    for s in report["samples"]:
+        print(
+            f"[soak] day {s['day']:>4}  rss {s['rss'] / 1024:>9.0f} KB  "
+            f"traced {s['traced'] / 1024:>8.1f} KB"
+        )
+    print(
+        f"[soak] {report['days']} days, {report['ticks']} ticks in {report['wall_seconds']:.1f}s "
+        f"({report['ticks_per_second']:.0f} ticks/s, tracemalloc on)"
+    )
+    print(
+        f"[soak] Growth: traced {report['growth']['traced'] / 1024:+.1f} KB since day "
+        f"{report['traced_since']}, rss {report['growth']['rss'] / 1024:+.0f} KB since day "
+        f"{report['rss_since']} (limit {report['limit'] / 1024:.0f} KB)"
+    )
+    print(f"[soak] Traced peak: {report['traced_peak'] / 1024:.1f} KB")
+    if report["churn"]:
+        worst = max(report["churn"], key=lambda w: w["mean"])
+        print(
+            f"[soak] Churn per tick: mean {worst['mean'] / 1024:.1f} KB, max "
+            f"{max(w['max'] for w in report['churn']) / 1024:.1f} KB in the worst of "
+            f"{len(report['churn'])} sampled day(s) (limit {report['churn_limit'] / 1024:.0f} KB mean); "
+            f"kept per tick {worst['net']:+.1f} B, {worst['blocks']:+.2f} blocks"
+        )
+    if report["top_growth"]:
+        print("[soak] Top growing allocation sites:")
+        for stat in report["top_growth"]:
+            print(f"    {stat}")
+    print(
+        f"[soak] Prayers notified: {report['fired']}, missed: {len(report['missed'])}, "
+        f"max lateness {report['max_lateness']:.0f}s, reminders: {report['reminders']}"
+    )
+    for day, name in report["missed"][:top_missed]:
+        print(f"    missed {name} on {day}")
+    print("[soak] PASS" if passed else "[soak] FAIL: memory growth or churn beyond the limit")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak-test scheduler memory over a simulated year.")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2026, 1, 1))
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--warmup-days", type=int, default=3)
+    parser.add_argument("--sample-days", type=int, default=7)
+    parser.add_argument("--max-growth-kb", type=int, default=512)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=1, help="tracemalloc traceback depth")
+    parser.add_argument("--max-tick-churn-kb", type=float, default=16)
+    args = parser.parse_args(argv)
+
+    passed, report = run_soak(
+        args.start,
+        args.days,
+        warmup_days=args.warmup_days,
+        sample_days=args.sample_days,
+        max_growth_kb=args.max_growth_kb,
+        top=args.top,
+        frames=args.frames,
+        max_tick_churn_kb=args.max_tick_churn_kb,
+    )
+    print_report(passed, report)
+    return 0 if passed and not report["missed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Local stand-in for islom.uz's PDF endpoint, with fault injection.
+
+Serves generated timetable PDFs at /prayertime/pdf/<region>/<month> and can
+inject latency, 5xx errors, HTML error pages, truncated bodies, dropped
+connections and leading whitespace before %PDF-. The PDFs carry the
+synthetic timetable as plain text; they exercise download_pdf, not the
+table extraction in parse_pdf_to_json.
+
+Usage:
+    python -m pdf_version.standin_server --port 8080 --error-rate 0.2 --latency 0.5
+    # then: download_pdf(15, 2026, 1, base_url="http://127.0.0.1:8080")
+"""
+
+import argparse
+import random
+import re
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from . import regions
+from .simulate import PRAYER_ORDER, synthetic_month_data
+
+PDF_PATH_RE = re.compile(r"^/prayertime/pdf/(\d+)/(\d{1,2})/?$")
+
+ERROR_PAGE = (
+    b"<!DOCTYPE html><html><head><title>503 Service Unavailable</title></head>"
+    b"<body><h1>Service Unavailable</h1><p>Please try again later.</p></body></html>"
+)
+
+
+class Faults:
+    """Probabilities (0..1) of each injected fault, plus latency in seconds."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        html_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        disconnect_rate: float = 0.0,
+        whitespace_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.html_rate = html_rate
+        self.truncate_rate = truncate_rate
+        self.disconnect_rate = disconnect_rate
+        self.whitespace_rate = whitespace_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(lines) -> bytes:
+    """Build a minimal one-page PDF showing lines of Latin-1 text."""
+    content = "BT /F1 10 Tf 40 800 Td 13 TL\n"
+    content += "".join(f"({_pdf_escape(line)}) '\n" for line in lines)
+    content += "ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        "/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode()
+    return bytes(out)
+
+
+def timetable_pdf(region_id: int, year: int, month: int) -> bytes:
+    """Generated timetable PDF for region + month (synthetic times)."""
+    region = regions.get(region_id)
+    # Titled with the city, like the real PDFs (bulk_fetch checks it)
+    title = f"{region.name} ({region_id})" if region else f"Region {region_id}"
+    lines = [f"{title}  {year}-{month:02d}", "", "Day  " + "  ".join(PRAYER_ORDER)]
+    for day, times in synthetic_month_data(year, month, region_id).items():
+        lines.append(f"{day[-2:]}   " + "  ".join(times[name] for name in PRAYER_ORDER))
+    return build_pdf(lines)
+
+
+class Stats:
+    """Thread-safe counters of what the server sent."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.outcomes = {}
+
+    def record(self, outcome: str, sent: int):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server_version = "islom-standin/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, outcome: str, length=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body) if length is None else length))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.record(outcome, len(body))
+
+    def do_GET(self):
+        faults = self.server.faults
+        match = PDF_PATH_RE.match(self.path)
+        if not match:
+            self._send(404, b"not found", "text/plain", "not_found")
+            return
+
+        delay = faults.delay()
+        if delay:
+            threading.Event().wait(delay)
+
+        region_id, month = int(match.group(1)), int(match.group(2))
+        if not 1 <= month <= 12:
+            self._send(404, b"bad month", "text/plain", "not_found")
+            return
+
+        if faults.roll(faults.error_rate):
+            self._send(503, b"Service Unavailable", "text/plain", "error_5xx")
+            return
+        if faults.roll(faults.html_rate):
+            # 200 OK with an HTML page, like a CDN/captcha interstitial
+            self._send(200, ERROR_PAGE * 4, "text/html; charset=utf-8", "html_page")
+            return
+
+        body = self.server.pdf_for(region_id, month)
+        if faults.roll(faults.whitespace_rate):
+            body = b"\r\n  \n" + body
+            outcome = "ok_whitespace"
+        else:
+            outcome = "ok"
+
+        if faults.roll(faults.truncate_rate):
+            # Consistent headers, body cut short (e.g. a broken cache entry)
+            self._send(200, body[: len(body) // 2], "application/pdf", "truncated")
+        elif faults.roll(faults.disconnect_rate):
+            # Promise the full body, then drop the connection halfway
+            half = body[: len(body) // 2]
+            self._send(200, half, "application/pdf", "disconnected", length=len(body))
+            self.close_connection = True
+        else:
+            self._send(200, body, "application/pdf", outcome)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), faults: Faults | None = None, year=None, verbose=False):
+        super().__init__(address, StandInHandler)
+        self.faults = faults or Faults()
+        self.year = year or date.today().year
+        self.verbose = verbose
+        self.stats = Stats()
+        self._pdfs = {}
+        self._pdfs_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def pdf_for(self, region_id: int, month: int) -> bytes:
+        key = (region_id, month)
+        with self._pdfs_lock:
+            if key not in self._pdfs:
+                self._pdfs[key] = timetable_pdf(region_id, self.year, month)
+            return self._pdfs[key]
+
+    def start_background(self):
+        """Serve from a daemon thread. Returns the thread."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 503 responses")
+    parser.add_argument("--html-rate", type=float, default=0.0, help="share of 200 HTML error pages")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="share of truncated PDFs")
+    parser.add_argument("--disconnect-rate", type=float, default=0.0, help="share of dropped connections")
+    parser.add_argument("--whitespace-rate", type=float, default=0.0, help="share with whitespace before %%PDF-")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def faults_from_args(args) -> Faults:
+    return Faults(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        html_rate=args.html_rate,
+        truncate_rate=args.truncate_rate,
+        disconnect_rate=args.disconnect_rate,
+        whitespace_rate=args.whitespace_rate,
+        seed=args.seed,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local islom.uz stand-in server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = StandInServer((args.host, args.port), faults_from_args(args), verbose=True)
+    print(f"[stand-in] Serving on {server.base_url}/prayertime/pdf/<region>/<month>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[stand-in] {server.stats.requests} requests, {server.stats.bytes_sent} bytes, {server.stats.outcomes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import json
+from .storage import get_state_path
+
+SNAPSHOT_VERSION = 1
+
+_last_written = None  # serialized text of the last snapshot we wrote/read
+
+
+def file_validator(path):
+    """Return [mtime_ns, size] for path, or None if it does not exist."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_snapshot():
+    """Load the last snapshot. Returns a dict or None if missing/corrupt/old."""
+    global _last_written
+    path = get_state_path()
+    try:
+        text = path.read_text(encoding="utf-8")
+        data = json.loads(text)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        return None
+    _last_written = text
+    return data
+
+
+def save_snapshot(state: dict) -> bool:
+    """
+    Atomically write state to disk if it differs from the last snapshot.
+    Returns True if the file was written.
+    """
+    global _last_written
+    text = json.dumps(
+        {"version": SNAPSHOT_VERSION, **state}, ensure_ascii=False, sort_keys=True
+    )
+    if text == _last_written:
+        return False
+
+    path = get_state_path()
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        # Bytes, not write_text(): UTF-8 whatever the locale, and no text
+        # wrapper per save (under tracemalloc those leave phantom traces
+        # that read as steady growth in soak.py)
+        tmp_path.write_bytes(text.encode("utf-8"))
+        tmp_path.replace(path)
+    except OSError as e:
+        print(f"[snapshot] Could not write {path}: {e}")
+        return False
+    _last_written = text
+    return True
+
+
+def reset():
+    """Forget what was written (used when the storage directory changes)."""
+    global _last_written
+    _last_written = None
@@ -0,0 +1,163 @@
+"""
+Status output fan-out.
+
+write_status() renders one payload per change and hands it to every enabled
+sink, so bars and widgets read a ready-made payload instead of recomputing
+the next prayer themselves.
+
+Built-in sinks (enable with PRAYER_STATUS_SINKS=tmux,waybar,fifo,stdout):
+    tmux    ~/.cache/prayer-next.txt and ~/.cache/prayer-today.txt (default)
+    waybar  ~/.cache/prayer-status.json, waybar and i3blocks JSON keys
+    fifo    one JSON line per change into PRAYER_STATUS_FIFO
+    stdout  one JSON line per change on stdout (log output moves to stderr)
+"""
+
+import errno
+import json
+import os
+import sys
+from pathlib import Path
+from . import tmux_helper
+
+JSON_FILE = tmux_helper.CACHE_DIR / "prayer-status.json"
+FIFO_PATH = Path(
+    os.environ.get("PRAYER_STATUS_FIFO")
+    or f"/run/user/{os.getuid()}/prayer-status.fifo"
+)
+DEFAULT_SINKS = "tmux"
+
+_sinks = {}  # name -> callable(payload)
+_last_payload = None
+_fifo_fd = None  # write end of the FIFO, kept open while a reader is attached
+_stdout = None  # the real stdout once claim_stdout() moved logging to stderr
+
+
+def register_sink(name: str, func):
+    """Register func(payload) under name. Replaces an existing sink of that name."""
+    _sinks[name] = func
+
+
+def unregister_sink(name: str):
+    _sinks.pop(name, None)
+
+
+def enabled_sinks():
+    """Names of sinks to publish to, from PRAYER_STATUS_SINKS."""
+    value = os.environ.get("PRAYER_STATUS_SINKS") or DEFAULT_SINKS
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def publish(payload: dict) -> bool:
+    """
+    Send payload to every enabled sink, unless it equals the last one.
+    Returns True if the payload was published.
+    """
+    global _last_payload
+    if payload == _last_payload:
+        return False
+    _last_payload = payload
+
+    for name in enabled_sinks():
+        sink = _sinks.get(name)
+        if sink is None:
+            print(f"[status] Unknown sink: {name}")
+            continue
+        try:
+            sink(payload)
+        except Exception as e:
+            print(f"[status] Sink {name} failed: {e}")
+    return True
+
+
+def reset():
+    """Forget the last payload so the next publish always goes out."""
+    global _last_payload
+    _last_payload = None
+
+
+def _json_line(payload: dict) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def bar_json(payload: dict) -> dict:
+    """The payload in waybar (text/tooltip/class/alt) and i3blocks (full_text/short_text) form."""
+    return {
+        "text": payload["text"],
+        "tooltip": payload["tooltip"],
+        "class": payload["class"],
+        "alt": payload["class"],
+        "full_text": payload["text"],
+        "short_text": payload.get("next_prayer") or payload["text"],
+    }
+
+
+def tmux_sink(payload: dict):
+    tmux_helper.write_next_prayer(payload["text"])
+    tmux_helper.write_full_day(payload["tooltip"])
+
+
+def waybar_sink(payload: dict):
+    JSON_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = JSON_FILE.with_suffix(".tmp")
+    tmp_path.write_text(_json_line(bar_json(payload)) + "\n")
+    tmp_path.replace(JSON_FILE)
+
+
+def _open_fifo():
+    """Open the FIFO for writing without blocking. Returns None if nobody reads it."""
+    if not FIFO_PATH.exists():
+        FIFO_PATH.parent.mkdir(parents=True, exist_ok=True)
+        os.mkfifo(FIFO_PATH, 0o600)
+    try:
+        return os.open(FIFO_PATH, os.O_WRONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    except OSError as e:
+        if e.errno == errno.ENXIO:  # no reader attached
+            return None
+        raise
+
+
+def fifo_sink(payload: dict):
+    """
+    Write one line to the FIFO if someone is reading it; never block.
+    The write end stays open between changes (closing it would give a
+    streaming reader like `cat` EOF) and is reopened when the reader goes away.
+    """
+    global _fifo_fd
+    line = (_json_line(bar_json(payload)) + "\n").encode()
+    for _ in range(2):
+        if _fifo_fd is None:
+            _fifo_fd = _open_fifo()
+            if _fifo_fd is None:
+                return
+        try:
+            os.write(_fifo_fd, line)
+            return
+        except BlockingIOError:
+            return  # reader is not keeping up; it gets the next change
+        except BrokenPipeError:
+            # Reader left; a new one may already be waiting on a fresh open
+            os.close(_fifo_fd)
+            _fifo_fd = None
+
+
+def claim_stdout():
+    """
+    Reserve stdout for the stdout sink: print() (all log output) goes to
+    stderr from now on, so consumers of the JSON stream only see payloads.
+    """
+    global _stdout
+    if _stdout is None:
+        _stdout = sys.stdout
+        sys.stdout = sys.stderr
+
+
+def stdout_sink(payload: dict):
+    claim_stdout()
+    _stdout.write(_json_line(payload) + "\n")
+    _stdout.flush()
+
+
+register_sink("tmux", tmux_sink)
+register_sink("waybar", waybar_sink)
+register_sink("fifo", fifo_sink)
+register_sink("stdout", stdout_sink)
@@ -1,8 +1,17 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path.home() / ".local/share/prayer-times"
 TMP_FILE = Path("/tmp/next_prayer")
 
+# Optional system-wide cache shared by every user on the host,
+# e.g. PRAYER_TIMES_SHARED_DIR=/var/cache/prayer-times
+SHARED_DIR = (
+    Path(os.environ["PRAYER_TIMES_SHARED_DIR"])
+    if os.environ.get("PRAYER_TIMES_SHARED_DIR")
+    else None
+)
+
 
 def get_month_paths(year: int, month: int):
     """Return (pdf_path, json_path) for given year-month."""
@@ -11,3 +20,20 @@ def get_month_paths(year: int, month: int):
     pdf_path = BASE_DIR / f"{name}.pdf"
     json_path = BASE_DIR / f"{name}.json"
     return pdf_path, json_path
+
+
+def get_shared_month_paths(region_id: int, year: int, month: int):
+    """Return (pdf_path, json_path, lock_path) in the shared cache for region + year-month."""
+    region_dir = SHARED_DIR / str(region_id)
+    name = f"{year:04d}-{month:02d}"
+    return (
+        region_dir / f"{name}.pdf",
+        region_dir / f"{name}.json",
+        region_dir / f"{name}.lock",
+    )
+
+
+def get_state_path():
+    """Return the path of the scheduler's warm-start snapshot."""
+    BASE_DIR.mkdir(parents=True, exist_ok=True)
+    return BASE_DIR / "scheduler-state.json"
@@ -0,0 +1,238 @@
+"""
+Validation of a parsed month before it is saved.
+
+parse_pdf_to_json runs every month through validate_month() once, at ingest
+time. The checks work column by column (one list of minutes per prayer):
+
+- format: every cell is HH:MM (H:MM and HH.MM are repaired to HH:MM)
+- calendar: exactly one row per day of the month
+- order: Fajr < Sunrise < Dhuhr < Asr < Maghrib < Isha on every day
+- deltas: a prayer moves at most MAX_DAILY_DELTA_MINUTES from one day to the
+  next, including from the last day of the previous month
+
+Single bad cells and missing days are repaired by interpolating the column;
+a month with too many problems is rejected. Whatever is saved is therefore
+well-formed, zero-padded and ordered, and the scheduler can compare times as
+plain strings without parsing them. JSON saved before these checks existed
+(or by an older instance into the shared cache) is padded on load with
+normalize_times().
+"""
+
+import calendar
+import re
+
+PRAYER_ORDER = ["Fajr", "Sunrise", "Dhuhr", "Asr", "Maghrib", "Isha"]
+
+MAX_DAILY_DELTA_MINUTES = 10
+MAX_REPAIR_FRACTION = 0.1  # reject the month if more cells than this need repair
+
+TIME_RE = re.compile(r"^\s*(\d{1,2})\s*[:.]\s*(\d{2})\s*$")
+
+
+def parse_time(value):
+    """'05:55' / '5:55' / '05.55' -> minutes since midnight, None if invalid."""
+    match = TIME_RE.match(str(value)) if value is not None else None
+    if not match:
+        return None
+    hh, mm = int(match.group(1)), int(match.group(2))
+    if hh > 23 or mm > 59:
+        return None
+    return hh * 60 + mm
+
+
+def format_time(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def normalize_times(month_data):
+    """
+    Zero-pad every time in saved month data ("5:45" -> "05:45") and drop
+    cells that are not times, so string comparison stays time order.
+    Returns None if month_data is not a month at all.
+    """
+    if not isinstance(month_data, dict):
+        return None
+    clean = {}
+    for key, row in month_data.items():
+        if not isinstance(row, dict):
+            continue
+        times = {}
+        for name, raw in row.items():
+            minutes = parse_time(raw)
+            if minutes is not None:
+                times[name] = format_time(minutes)
+        clean[key] = times
+    return clean
+
+
+def _columns(year: int, month: int, month_data: dict, problems: list):
+    """Build one list per prayer, indexed by day - 1 (None = missing/invalid)."""
+    days = calendar.monthrange(year, month)[1]
+    columns = {name: [None] * days for name in PRAYER_ORDER}
+    prefix = f"{year:04d}-{month:02d}-"
+
+    for key, row in month_data.items():
+        if not key.startswith(prefix) or not key[len(prefix):].isdigit():
+            problems.append(f"{key}: not a day of {year}-{month:02d}, dropped")
+            continue
+        day = int(key[len(prefix):])
+        if not 1 <= day <= days:
+            problems.append(f"{key}: not a day of {year}-{month:02d}, dropped")
+            continue
+        for name in PRAYER_ORDER:
+            raw = row.get(name) if isinstance(row, dict) else None
+            minutes = parse_time(raw)
+            if minutes is None:
+                problems.append(f"{key} {name}: invalid time {raw!r}")
+            elif raw != format_time(minutes):
+                problems.append(f"{key} {name}: {raw!r} normalized")
+            columns[name][day - 1] = minutes
+
+    for index in range(days):
+        if all(columns[name][index] is None for name in PRAYER_ORDER):
+            problems.append(f"{prefix}{index + 1:02d}: day missing")
+    return columns
+
+
+def _drop_order_violations(columns: dict, prefix: str, problems: list):
+    """Invalidate the cell that breaks Fajr < ... < Isha on each day."""
+    days = len(columns["Fajr"])
+    for index in range(days):
+        for _ in range(len(PRAYER_ORDER)):
+            row = [columns[name][index] for name in PRAYER_ORDER]
+            valid = [(i, v) for i, v in enumerate(row) if v is not None]
+            bad_pairs = [
+                (a, b) for (a, va), (b, vb) in zip(valid, valid[1:]) if va >= vb
+            ]
+            if not bad_pairs:
+                break
+            # Blame the cell of the first bad pair that is further from its
+            # own column's neighbours (yesterday / tomorrow)
+            a, b = bad_pairs[0]
+            culprit = max((a, b), key=lambda i: _neighbour_distance(columns[PRAYER_ORDER[i]], index))
+            name = PRAYER_ORDER[culprit]
+            problems.append(
+                f"{prefix}{index + 1:02d} {name}: {format_time(row[culprit])} out of order"
+            )
+            columns[name][index] = None
+
+
+def _neighbour_distance(column, index):
+    value = column[index]
+    neighbours = [
+        column[i] for i in (index - 1, index + 1) if 0 <= i < len(column) and column[i] is not None
+    ]
+    if not neighbours:
+        return 0
+    return min(abs(value - n) for n in neighbours)
+
+
+def _drop_spikes(columns: dict, prefix: str, previous_last: dict, problems: list):
+    """Invalidate cells that jump away from both neighbours by more than the limit."""
+    limit = MAX_DAILY_DELTA_MINUTES
+    for name, column in columns.items():
+        before = previous_last.get(name)
+        for index, value in enumerate(column):
+            if value is None:
+                continue
+            prev = column[index - 1] if index > 0 else before
+            nxt = column[index + 1] if index + 1 < len(column) else None
+            neighbours = [n for n in (prev, nxt) if n is not None]
+            if len(neighbours) == 1:
+                # At the edge of the data: also look one day further in,
+                # so a spike next door doesn't get this cell dropped
+                further = index + 2 if prev is None else index - 2
+                if 0 <= further < len(column) and column[further] is not None:
+                    neighbours.append(column[further])
+            jumps = [abs(value - n) > limit for n in neighbours]
+            if jumps and all(jumps):
+                problems.append(
+                    f"{prefix}{index + 1:02d} {name}: {format_time(value)} jumps more "
+                    f"than {limit} min from its neighbours"
+                )
+                column[index] = None
+            elif index == 0 and prev is not None and abs(value - prev) > limit:
+                problems.append(
+                    f"{prefix}01 {name}: {format_time(value)} is more than {limit} min "
+                    f"from the previous month ({format_time(prev)})"
+                )
+
+
+def _interpolate(column, before=None):
+    """Fill None cells from the nearest valid values. Returns number filled."""
+    known = [(i, v) for i, v in enumerate(column) if v is not None]
+    if before is not None:
+        known.insert(0, (-1, before))
+    if not known:
+        return 0
+    filled = 0
+    for index, value in enumerate(column):
+        if value is not None:
+            continue
+        left = next(((i, v) for i, v in reversed(known) if i < index), None)
+        right = next(((i, v) for i, v in known if i > index), None)
+        if left and right:
+            (i0, v0), (i1, v1) = left, right
+            column[index] = round(v0 + (v1 - v0) * (index - i0) / (i1 - i0))
+        else:
+            column[index] = (left or right)[1]
+        filled += 1
+    return filled
+
+
+def validate_month(year: int, month: int, month_data: dict, previous_month=None):
+    """
+    Validate (and where possible repair) one month in parse_pdf_to_json format.
+
+    Args:
+        year, month: The month the data is for
+        month_data: {"YYYY-MM-DD": {"Fajr": "05:55", ...}, ...}
+        previous_month: Already validated data of the month before (optional),
+            used to check the deltas across the month boundary
+
+    Returns (clean_month_data, problems). Raises RuntimeError if the month
+    is too broken to repair.
+    """
+    problems = []
+    prefix = f"{year:04d}-{month:02d}-"
+    columns = _columns(year, month, month_data, problems)
+
+    previous_last = {}
+    if previous_month:
+        last_key = max(previous_month)
+        previous_last = {
+            name: parse_time(previous_month[last_key].get(name)) for name in PRAYER_ORDER
+        }
+        previous_last = {k: v for k, v in previous_last.items() if v is not None}
+
+    _drop_order_violations(columns, prefix, problems)
+    _drop_spikes(columns, prefix, previous_last, problems)
+
+    days = len(columns["Fajr"])
+    repaired = 0
+    for name in PRAYER_ORDER:
+        if all(v is None for v in columns[name]):
+            raise RuntimeError(f"Timetable rejected: no valid {name} times in {year}-{month:02d}")
+        repaired += _interpolate(columns[name], previous_last.get(name))
+
+    if repaired > MAX_REPAIR_FRACTION * days * len(PRAYER_ORDER):
+        raise RuntimeError(
+            f"Timetable rejected: {repaired} of {days * len(PRAYER_ORDER)} cells "
+            f"in {year}-{month:02d} are invalid"
+        )
+
+    # Interpolation across a gap can't break the order, but be strict anyway
+    for index in range(days):
+        row = [columns[name][index] for name in PRAYER_ORDER]
+        if any(a >= b for a, b in zip(row, row[1:])):
+            raise RuntimeError(f"Timetable rejected: {prefix}{index + 1:02d} out of order after repair")
+
+    clean = {
+        f"{prefix}{index + 1:02d}": {
+            name: format_time(columns[name][index]) for name in PRAYER_ORDER
+        }
+        for index in range(days)
+    }
+    if repaired:
+        problems.append(f"{repaired} cell(s) repaired by interpolation")
+    return clean, problems
@@ -0,0 +1,165 @@
+"""
+Change notifications for the storage directories.
+
+InotifyWatcher asks the kernel to report writes, renames and deletions of
+month JSON files, so the scheduler can keep month data in memory and only
+reload it when something actually changed on disk (manual re-parse, another
+instance, the shared cache). One watcher covers several directories; changes
+are reported as paths (a watched directory itself when it was deleted).
+Where inotify is unavailable, PollingWatcher compares mtimes every
+POLL_INTERVAL_SECONDS instead.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import re
+import select
+import struct
+import time
+from pathlib import Path
+
+MONTH_FILE_RE = re.compile(r"^\d{4}-\d{2}\.json$")
+POLL_INTERVAL_SECONDS = 5
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    def __init__(self, directories, pattern=MONTH_FILE_RE):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}  # watch descriptor -> directory
+        for directory in directories:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(err, f"inotify_add_watch failed for {directory}")
+            self._dirs[wd] = Path(directory)
+        self.directories = list(self._dirs.values())
+        self.pattern = pattern
+        self._pending = set()
+        # Reused for every read: os.read() would allocate 64 KB per poll,
+        # i.e. per tick, even when nothing happened
+        self._buf = bytearray(64 * 1024)
+
+    def _read(self):
+        while True:
+            try:
+                size = os.readv(self._fd, [self._buf])
+            except BlockingIOError:
+                return
+            buf = memoryview(self._buf)[:size]
+            offset = 0
+            while offset < size:
+                wd, mask, _, length = _EVENT.unpack_from(buf, offset)
+                offset += _EVENT.size
+                name = bytes(buf[offset : offset + length]).rstrip(b"\0").decode(errors="replace")
+                offset += length
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_DELETE_SELF:
+                    self._pending.add(directory)
+                elif self.pattern.match(name):
+                    self._pending.add(directory / name)
+
+    def wait(self, timeout: float) -> bool:
+        """Block up to timeout seconds. Returns True as soon as a relevant change is pending."""
+        deadline = time.monotonic() + timeout
+        while not self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if readable:
+                self._read()
+        return bool(self._pending)
+
+    def poll(self):
+        """Return the paths of changed files since the last poll (never blocks)."""
+        self._read()
+        changed, self._pending = self._pending, set()
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    def __init__(self, directories, pattern=MONTH_FILE_RE):
+        self.directories = [Path(d) for d in directories]
+        self.pattern = pattern
+        self._seen = self._scan()
+        self._pending = set()
+        self._last_scan = time.monotonic()
+
+    def _scan(self):
+        state = {}
+        for directory in self.directories:
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if self.pattern.match(entry.name):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        state[directory / entry.name] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def _rescan(self):
+        current = self._scan()
+        for path in current.keys() | self._seen.keys():
+            if current.get(path) != self._seen.get(path):
+                self._pending.add(path)
+        self._seen = current
+        self._last_scan = time.monotonic()
+
+    def wait(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+            self._rescan()
+        return bool(self._pending)
+
+    def poll(self):
+        if time.monotonic() - self._last_scan >= POLL_INTERVAL_SECONDS:
+            self._rescan()
+        changed, self._pending = self._pending, set()
+        return changed
+
+    def close(self):
+        pass
+
+
+def watch(*directories):
+    """Watch directories with inotify, falling back to polling."""
+    try:
+        return InotifyWatcher(directories)
+    except (OSError, AttributeError) as e:
+        reason = errno.errorcode.get(getattr(e, "errno", None) or 0, e)
+        print(f"[watcher] inotify unavailable ({reason}), polling every {POLL_INTERVAL_SECONDS}s")
+        return PollingWatcher(directories)